@@ -1,147 +1,744 @@
 ## IMPORTS
-from google.cloud import firestore
-from google.cloud.firestore_v1.query import Query
-import json
-import random
+import html
+import io
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable, Iterable
+import pandas as pd
 import pytz
 import streamlit as st
+import export
+import fulltext
+import layout
+import schema
+import storage
 st.set_page_config(layout="wide")
 
 
 
 ## DB CONNECT
+@st.cache_resource(show_spinner=False)
+def __get_storage() -> storage.Storage:
+    """Cria a conexão com o Banco de Dados uma única vez por processo.
+    O cliente (e seu canal gRPC) é reaproveitado por todos os reruns e sessões.
+
+    Returns:
+        storage.Storage: Armazenamento configurado, já verificado.
+    """
+    db = storage.connect(st.secrets)
+    db.ping()
+
+    return db
+
+
 try:
-    key_dict = json.loads(st.secrets["textkey"])
-    db = firestore.Client.from_service_account_info(key_dict)
+    db = __get_storage()
 except Exception as e:
+    # Conexão com falha não fica em cache: o próximo rerun tenta novamente
+    __get_storage.clear()
     st.write(f":warning: Erro na conexão com o Banco de Dados:\n{e}")
     st.write("Se persistir o erro, contate o desenvolvedor!")
 
+# Rótulos dos grupos de químicos (prefixo dos campos de fechamento_quim)
+CHEMICAL_GROUPS = {"eta": "ETA", "etei": "ETEI", "comuns": "Áreas Comuns"}
 
+# Registros por página nas buscas por período (padrão, configurável na tela)
+RANGE_PAGE_SIZE = 50
 
+# Intervalo (s) em que a Home aberta apresenta o estado recebido em tempo real
+LIVE_REFRESH_SECONDS = 5
 
 
-## FUNÇÕES
-def __spaces(repeticoes: int = 3) -> None:
-    """Escreve espaços vazios para como forma de adicionar espaços verticais entre os elementos.
 
-    Args:
-        repeticoes (int, optional): Quantidade de espaços verticais. Defaults to 3.
+
+
+@st.cache_resource(show_spinner=False)
+def __open_fulltext() -> fulltext.ObservationIndex:
+    """Abre o índice de busca das observações uma única vez por processo.
+
+    Returns:
+        fulltext.ObservationIndex: Índice das observações.
     """
-    _ = [st.write("") for _ in range(repeticoes)]
+    return fulltext.ObservationIndex(st.secrets.get("storage", {}).get("fulltext_path", "observacoes.db"))
 
 
 
 
 
-def __parse_to_boolean(submit_args: dict) -> dict:
-    """Converte os estados dos radio buttons de Sim ou Não para booleano.
+def __get_fulltext() -> fulltext.ObservationIndex:
+    """Índice de busca das observações, pronto para busca.
+    Se o índice local estiver vazio (primeira execução no servidor), ele é construído a partir do histórico.
 
-    Args:
-        submit_args (dict): Argumentos para subir para o Banco de Dados. 
+    Returns:
+        fulltext.ObservationIndex: Índice das observações.
+    """
+    index = __open_fulltext()
+    if len(index) == 0:
+        end = datetime.now(pytz.utc) + timedelta(days=1)
+        fields = ("date", "endedshift", *schema.fields_of_type("obs", "str"))
+        index.rebuild(db.query_range("obs", storage.HISTORY_START, end, fields))
+
+    return index
+
+
+
+
+
+## CACHE
+class ShiftCache:
+    """Cache LRU com expiração (TTL) para os dados concatenados dos turnos, compartilhado por todas as sessões.
+    As chaves são tuplas (data, turno, área) e são invalidadas por (data, turno) a cada inserção.
+    Buscas simultâneas do mesmo turno são coalescidas em uma só (single-flight).
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 600, load_timeout: float = 10) -> None:
+        """
+        Args:
+            maxsize (int, optional): Quantidade máxima de entradas. Defaults to 256.
+            ttl (float, optional): Tempo de vida de cada entrada em segundos. Defaults to 600.
+            load_timeout (float, optional): Espera máxima, em segundos, pela busca de outra sessão. Defaults to 10.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.load_timeout = load_timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Buscas em andamento por (data, turno) e contador de invalidações
+        self._inflight = {}
+        self._generation = 0
+
+
+    def get(self, key: tuple) -> dict:
+        """Retorna o valor guardado para a chave.
+
+        Args:
+            key (tuple): Chave (data, turno, área).
+
+        Raises:
+            KeyError: Caso a chave não exista ou tenha expirado.
+
+        Returns:
+            dict: Objeto concatenado da área.
+        """
+        with self._lock:
+            return self._get(key)
+
+
+    def _get(self, key: tuple) -> dict:
+        expires, value = self._entries[key]
+        if expires < time.monotonic():
+            del self._entries[key]
+            raise KeyError(key)
+
+        self._entries.move_to_end(key)
+        return value
+
+
+    def set(self, key: tuple, value: dict) -> None:
+        """Guarda o valor para a chave, descartando a entrada menos usada se necessário.
+
+        Args:
+            key (tuple): Chave (data, turno, área).
+            value (dict): Objeto concatenado da área.
+        """
+        with self._lock:
+            self._set(key, value)
+
+
+    def _set(self, key: tuple, value: dict) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+    def load(self, date, shift: str, fetch: Callable[[list], dict]) -> dict:
+        """Objetos de todas as áreas de um turno, buscando apenas as ausentes do cache.
+        Uma única sessão busca o turno por vez: as demais que pedem o mesmo turno aguardam essa busca
+        e leem o resultado do cache, em vez de repetir a leitura no banco. Se a busca não terminar
+        em load_timeout segundos, quem aguarda busca o turno por conta própria.
+
+        Args:
+            date (date): Data do turno.
+            shift (str): Turno.
+            fetch (Callable[[list], dict]): Busca as áreas informadas e devolve os objetos indexados pela área.
+
+        Returns:
+            dict: Objetos de cada área, indexados pelo identificador da área.
+        """
+        leader = False
+        while True:
+            with self._lock:
+                shift_data = {}
+                for area in schema.AREAS:
+                    try:
+                        shift_data[area] = self._get((date, shift, area))
+                    except KeyError:
+                        pass
+
+                missing = [area for area in schema.AREAS if area not in shift_data]
+                if not missing:
+                    return shift_data
+
+                generation = self._generation
+                pending = self._inflight.get((date, shift))
+                if pending is None:
+                    pending = self._inflight[(date, shift)] = threading.Event()
+                    leader = True
+                    break
+
+            # Outra sessão já busca o turno: aguarda e confere o cache novamente.
+            # Uma busca travada (stream do Firestore parado, por exemplo) não bloqueia as demais sessões
+            if not pending.wait(self.load_timeout):
+                break
+
+        fetched = None
+        try:
+            fetched = fetch(missing)
+            return {**shift_data, **fetched}
+
+        finally:
+            with self._lock:
+                # Resultado buscado antes de uma invalidação não vai para o cache
+                if fetched is not None and generation == self._generation:
+                    for area, value in fetched.items():
+                        self._set((date, shift, area), value)
+                if leader:
+                    del self._inflight[(date, shift)]
+            if leader:
+                pending.set()
+
+
+    def invalidate(self, date, shift: str) -> None:
+        """Remove todas as áreas de um turno.
+
+        Args:
+            date (date): Data do turno.
+            shift (str): Turno.
+        """
+        with self._lock:
+            self._generation += 1
+            for area in schema.AREAS:
+                self._entries.pop((date, shift, area), None)
+
+
+
+
+
+@st.cache_resource
+def __shift_cache() -> ShiftCache:
+    """Instância única do cache de turnos, compartilhada entre reruns e sessões do processo.
 
     Returns:
-        dict: Arguntmentos devidamente convertidos. 
+        ShiftCache: Cache de turnos.
     """
-    new_args = submit_args
+    return ShiftCache()
+
 
-    for key_out in new_args.keys():
-        for key_in in new_args[key_out].keys():
-            if new_args[key_out][key_in] == "Não":
-                new_args[key_out][key_in] = False
-            elif new_args[key_out][key_in] == "Sim":
-                new_args[key_out][key_in] = True        
 
-    return new_args
 
 
+## TEMPO REAL
+class LiveShift:
+    """Estado materializado do turno mais recente, mantido em memória pelo listener do banco
+    e compartilhado por todas as sessões do processo: a Home lê o estado sem consultar o banco.
+    """
 
+    def __init__(self) -> None:
+        self.state_id = None
+        self.state = None
+        self.subscription = None
+        self._lock = threading.Lock()
 
 
-def __query(area: str, home: bool=False) -> Query.stream:
-    """Busca no Banco de Dados com filtros.
+    def update(self, state_id: str, state: dict) -> None:
+        """Substitui o estado pelo recebido do listener.
 
-    Args:
-        area (str): Identificador da coleção no banco de dados ('eta', 'etei', ou 'obs').
-        home (bool, optional): Opção para identificar a busca específica para a Home. Defaults to False.
+        Args:
+            state_id (str): ID do estado no formato 'AAAA-MM-DD_<turno>'.
+            state (dict): Estado materializado do turno.
+        """
+        with self._lock:
+            self.state_id, self.state = state_id, state
+
+
+    def snapshot(self) -> tuple:
+        """
+        Returns:
+            tuple: ID do estado e estado do turno mais recente (None antes da primeira atualização).
+        """
+        with self._lock:
+            return self.state_id, self.state
+
+
+    def is_active(self) -> bool:
+        """
+        Returns:
+            bool: Se o listener continua recebendo atualizações. O stream do Firestore termina
+            em erros irrecuperáveis e, a partir daí, o estado em memória fica desatualizado.
+        """
+        return self.subscription is not None and self.subscription.is_active
+
+
+
+
+
+@st.cache_resource(show_spinner=False)
+def __live_shift() -> LiveShift:
+    """Assina o turno mais recente uma única vez por processo.
 
     Returns:
-        Query.stream: Generator com objetos correspondentes aos filtros de busca aplicados.
+        LiveShift: Estado em tempo real, ou None caso o banco não ofereça atualizações em tempo real.
     """
-    if home:
-        fechamentos_ref = db.collection(f"fechamento_{area}")
-        docs = fechamentos_ref.order_by(
-            u"date", direction=firestore.Query.DESCENDING
-        ).limit(1)
+    live, cache = LiveShift(), __shift_cache()
 
-        date_query = datetime.strptime(
-            f"{docs.get()[0].to_dict()['date'].astimezone(pytz.timezone('America/Sao_Paulo')).date()}", "%Y-%m-%d"
-        )
-        shift = docs.get()[0].to_dict()["endedshift"]
+    def on_change(state_id: str, state: dict) -> None:
+        live.update(state_id, state)
+        # Inserções feitas por outras instâncias também invalidam o cache deste processo
+        cache.invalidate(datetime.strptime(state_id.split("_")[0], "%Y-%m-%d").date(), state["endedshift"])
 
-    else:
-        date_query = datetime.strptime(f"{st.session_state.date_search}", "%Y-%m-%d")
-        shift = st.session_state.sft_search
-
-
-    fechamentos_ref = db.collection(f"fechamento_{area}")
-    doc_ref = fechamentos_ref.where(
-        u"date", u">", date_query
-    ).where(
-        u"date", u"<", date_query + timedelta(days=1)
-    ).where(
-        u"endedshift", u"==", f"{shift}"
-    ).order_by(
-        u"date", direction=firestore.Query.ASCENDING
+    live.subscription = db.watch_latest_shift(on_change)
+
+    return live if live.subscription is not None else None
+
+
+
+
+
+## FUNÇÕES
+@st.cache_data(ttl=300, show_spinner=False)
+def __latest_shift() -> tuple:
+    """Identifica o último turno fechado no Banco de Dados.
+    Uma única leitura compartilhada por todas as áreas e mantida em cache até a próxima inserção.
+
+    Returns:
+        tuple: Data (datetime) e turno (str) do último registro inserido.
+    """
+    last_date, shift = db.latest_shift()
+
+    date_query = datetime.strptime(
+        f"{last_date.astimezone(pytz.timezone('America/Sao_Paulo')).date()}", "%Y-%m-%d"
     )
 
-    return doc_ref.stream()
+    return date_query, shift
+
+
 
 
 
+def __format_record(area: str, data: dict, fields: tuple) -> dict:
+    """Monta o objeto de uma área a partir de um registro do banco, no fuso de São Paulo.
 
+    Args:
+        area (str): Identificador da coleção no banco de dados ('eta', 'etei', 'obs' ou 'quim').
+        data (dict): Registro de uma área, como salvo no banco.
+        fields (tuple): Campos do objeto.
+
+    Returns:
+        dict: Objeto da área. Em registros anteriores à versão atual do schema,
+        campos ausentes recebem o valor padrão do seu tipo.
+    """
+    if data.get("schema_version") == schema.SCHEMA_VERSION:
+        record = {key: data[key] for key in fields}
+    else:
+        record = {key: data.get(key, schema.DEFAULTS[area].get(key)) for key in fields}
+    if "date" in data:
+        record["date"] = data["date"].astimezone(pytz.timezone("America/Sao_Paulo"))
+
+    return record
 
-def __merge_docs(area: str, query: Query.stream) -> dict:
+
+
+
+
+def __merge_docs(area: str, query: Iterable[dict], fields: tuple) -> dict:
     """Concatena os documentos com a mesma especificação em um só.
 
     Args:
-        area (str): Identificador da coleção no banco de dados ('eta', 'etei', ou 'obs').
-        query (Query.stream): Stream de queries resultantes da busca filtrada no banco de dados
+        area (str): Identificador da coleção no banco de dados ('eta', 'etei', 'obs' ou 'quim').
+        query (Iterable[dict]): Registros resultantes da busca filtrada no banco de dados, em ordem crescente de data.
+        fields (tuple): Campos do objeto concatenado.
 
     Returns:
         dict: Objeto com as informações concatenadas. 
         Retorna None caso não haja registros para a busca aplicada.
     """    
-    with open("db_fields.json", mode="r") as file:
-        fields_json = json.load(file)
-        merged = dict.fromkeys(fields_json[area])
+    # Como o registro mais recente prevalece, basta guardar o último enquanto o stream é percorrido
+    data = None
+    for record in query:
+        data = record
+        if data.get("date") == "":
+            return None
+
+    if data is None:
+        return dict.fromkeys(fields)
+
+    return __format_record(area, data, fields)
+
+
+
+
+
+def __fetch_area(area: str, date_query: datetime, shift: str) -> dict:
+    """Busca e concatena os documentos de uma área do turno.
+
+    Args:
+        area (str): Identificador da coleção no banco de dados ('eta', 'etei', 'obs' ou 'quim').
+        date_query (datetime): Data do turno buscado.
+        shift (str): Turno buscado.
+
+    Returns:
+        dict: Objeto com as informações concatenadas da área.
+    """
+    fields = schema.projection(area, "display")
+    query = db.query_area(
+        area=area, start=date_query, end=date_query + timedelta(days=1), shift=shift, fields=fields
+    )
+
+    return __merge_docs(area=area, query=query, fields=fields)
+
+
+
+
+
+def __state_id(date_query: datetime, shift: str) -> str:
+    """ID do documento materializado do turno na coleção shift_state.
+
+    Args:
+        date_query (datetime): Data do turno.
+        shift (str): Turno.
+
+    Returns:
+        str: ID no formato 'AAAA-MM-DD_<turno>'.
+    """
+    return f"{date_query.strftime('%Y-%m-%d')}_{shift}"
+
 
-    
-    for doc in query:
-        for key in merged.keys():
-            try:
-                if key == "date":
-                    if doc.to_dict()[key] == "":
-                        return None
-                    merged[key] = doc.to_dict()[key].astimezone(pytz.timezone("America/Sao_Paulo"))
-                
-                elif (key == "endedshift") | (merged[key] == ""):
-                    merged[key] = doc.to_dict()[key]   
-                
-                else:
-                    merged[key] = doc.to_dict()[key]
-            except KeyError:
-                merged[key] = 0
 
-    return merged
+
+
+def __fetch_state(date_query: datetime, shift: str, areas: list) -> dict:
+    """Busca o estado materializado do turno: um único documento com todas as áreas já concatenadas.
+
+    Args:
+        date_query (datetime): Data do turno buscado.
+        shift (str): Turno buscado.
+        areas (list): Áreas a serem retornadas.
+
+    Returns:
+        dict: Objetos de cada área, indexados pelo identificador da área.
+        Retorna None caso o turno não tenha documento materializado (turnos anteriores à sua criação).
+    """
+    fields = {area: schema.projection(area, "display") for area in areas}
+    state = db.get_state(__state_id(date_query, shift), fields)
+    if state is None:
+        return None
+
+    return {area: __format_record(area, state.get(area, {}), fields[area]) for area in areas}
+
+
+
+
+
+def __fetch_areas(date_query: datetime, shift: str, areas: list) -> dict:
+    """Busca áreas do turno no documento materializado ou, na ausência dele,
+    nas coleções em paralelo, uma thread por coleção.
+
+    Args:
+        date_query (datetime): Data do turno buscado.
+        shift (str): Turno buscado.
+        areas (list): Áreas a serem buscadas.
+
+    Returns:
+        dict: Objetos concatenados de cada área, indexados pelo identificador da área.
+    """
+    fetched = __fetch_state(date_query, shift, areas)
+
+    if fetched is None:
+        with ThreadPoolExecutor(max_workers=len(areas)) as executor:
+            futures = {
+                area: executor.submit(__fetch_area, area, date_query, shift)
+                for area in areas
+            }
+            fetched = {area: future.result() for area, future in futures.items()}
+
+    return fetched
+
+
+
+
+
+def __load_shift(date_query: datetime, shift: str) -> dict:
+    """Busca as quatro áreas do turno.
+    Áreas presentes no cache não são buscadas novamente no banco, e sessões simultâneas
+    que pedem o mesmo turno (como na troca de turno, na Home) compartilham uma única busca.
+
+    Args:
+        date_query (datetime): Data do turno buscado.
+        shift (str): Turno buscado.
+
+    Returns:
+        dict: Objetos concatenados de cada área, indexados pelo identificador da área.
+    """
+    return __shift_cache().load(date_query.date(), shift, partial(__fetch_areas, date_query, shift))
+
+
+
+
+
+def __fetch_range_page(area: str, search: dict) -> tuple:
+    """Busca a próxima página dos registros de uma área na busca por período.
+
+    Args:
+        area (str): Identificador da coleção no banco de dados ('eta', 'etei', 'obs' ou 'quim').
+        search (dict): Estado da busca por período (filtros e cursores).
+
+    Returns:
+        tuple: Registros da página (list) e o cursor da próxima página (None na última página).
+    """
+    return db.query_page(
+        area, search["start"], search["end"], search["shifts"], schema.projection(area, "display"),
+        search["page_size"], search["cursors"][area],
+    )
+
+
+
+
+
+def __new_range_search(start_date, end_date, shifts: list, page_size: int) -> dict:
+    """Cria o estado de uma busca por período, ainda sem nenhuma página carregada.
+
+    Args:
+        start_date (date): Primeiro dia do período.
+        end_date (date): Último dia do período.
+        shifts (list): Turnos buscados. Vazio para todos.
+        page_size (int): Registros por página, em cada coleção.
+
+    Returns:
+        dict: Filtros, cursores de cada coleção e turnos já carregados.
+    """
+    tz = pytz.timezone("America/Sao_Paulo")
+
+    return {
+        "start": tz.localize(datetime.combine(start_date, datetime.min.time())),
+        "end": tz.localize(datetime.combine(end_date + timedelta(days=1), datetime.min.time())),
+        "shifts": list(shifts),
+        "page_size": page_size,
+        "cursors": dict.fromkeys(schema.AREAS),
+        "pending": list(schema.AREAS),
+        "results": {},
+    }
+
+
+
+
+
+def __load_range_page(search: dict) -> None:
+    """Carrega a próxima página de cada coleção ainda não esgotada, em paralelo,
+    e concatena os registros por dia e turno nos resultados da busca.
+
+    Args:
+        search (dict): Estado da busca por período, atualizado no lugar.
+    """
+    with ThreadPoolExecutor(max_workers=len(schema.AREAS)) as executor:
+        futures = {area: executor.submit(__fetch_range_page, area, search) for area in search["pending"]}
+        pages = {area: future.result() for area, future in futures.items()}
+
+    for area, (records, cursor) in pages.items():
+        fields = schema.projection(area, "display")
+        # Registros em ordem crescente de data: o mais recente de cada turno prevalece
+        for record in records:
+            key = (record["date"].astimezone(pytz.timezone("America/Sao_Paulo")).date(), record["endedshift"])
+            shift_data = search["results"].setdefault(
+                key, {area: dict.fromkeys(schema.projection(area, "display")) for area in schema.AREAS}
+            )
+            shift_data[area] = __format_record(area, record, fields)
+
+        search["cursors"][area] = cursor
+
+    search["pending"] = [area for area in schema.AREAS if search["cursors"][area] is not None]
+
+
+
+
+
+def __export_range(start_date, end_date) -> bytes:
+    """Exporta em CSV os fechamentos completos de um período, página a página.
+    Executada apenas quando o botão de download é clicado; o Streamlit envia o conteúdo inteiro de uma vez.
+
+    Args:
+        start_date (date): Primeiro dia do período.
+        end_date (date): Último dia do período.
+
+    Returns:
+        bytes: Conteúdo do arquivo CSV.
+    """
+    tz = pytz.timezone("America/Sao_Paulo")
+    start = tz.localize(datetime.combine(start_date, datetime.min.time()))
+    end = tz.localize(datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+
+    file = io.BytesIO()
+    export.write_csv(export.iter_pages(db, start, end), file)
+
+    return file.getvalue()
+
+
+
+
+
+def __shift_summary(key: tuple, shift_data: dict) -> dict:
+    """Resumo de um turno em uma linha, para a tabela da busca por período.
+
+    Args:
+        key (tuple): Dia e turno.
+        shift_data (dict): Objetos de cada área do turno.
+
+    Returns:
+        dict: Colunas da tabela.
+    """
+    events = [
+        schema.DISPLAY[area][field]["label"]
+        for area in ("eta", "etei") for field in schema.fields_of_type(area, "bool")
+        if shift_data[area][field]
+    ]
+    chemicals = pd.to_numeric(
+        pd.Series([shift_data["quim"][field] for field in schema.fields_of_type("quim", "float")]), errors="coerce"
+    )
+
+    return {
+        "Dia": key[0].strftime("%d/%m/%Y"),
+        "Turno": key[1],
+        "Última modificação": shift_data["eta"]["date"].strftime("%H:%M") if shift_data["eta"]["date"] else "",
+        "Eventos (Sim)": ", ".join(events),
+        "Silo de Cal (%)": shift_data["etei"]["nivel_silo_cal"],
+        "Químicos (L)": round(chemicals.sum(), 2),
+        "Observações": sum(1 for field in schema.fields_of_type("obs", "str") if shift_data["obs"][field]),
+    }
+
+
+
+
+
+def __status_item(text: str, status: str) -> str:
+    """Item do turno em HTML, no formato de um alerta do Streamlit.
+
+    Args:
+        text (str): Texto do item.
+        status (str): 'good', 'bad' ou 'info'.
+
+    Returns:
+        str: Bloco HTML do item.
+    """
+    return f'<div class="item {status}">{html.escape(text)}</div>'
+
+
+
+
+
+def __format_value(value: float, unit: str = "") -> str:
+    """Valor numérico com a sua unidade ('%' junto ao número, as demais separadas por espaço).
+
+    Args:
+        value (float): Valor.
+        unit (str, optional): Unidade do campo. Defaults to "".
+
+    Returns:
+        str: Valor formatado.
+    """
+    return f"{value}{unit}" if unit in ("", "%") else f"{value} {unit}"
+
+
+
+
+
+def __render_items(area: str, record: dict) -> str:
+    """Itens de uma área (ETA ou ETEI) em um único bloco, com a cor definida pelo schema:
+    campos booleanos pela polaridade e campos numéricos pelo limite mínimo.
+
+    Args:
+        area (str): Identificador da área ('eta' ou 'etei').
+        record (dict): Objeto da área.
+
+    Returns:
+        str: Bloco markdown/HTML da área.
+    """
+    items = []
+    for field in schema.projection(area, "display"):
+        if field in schema.META_FIELDS:
+            continue
+        spec, value = schema.DISPLAY[area][field], record[field]
+
+        if schema.TYPES[area][field] == "bool":
+            good = bool(value) == (spec["polarity"] == "positive")
+            items.append(__status_item(f"[{'Sim' if value else 'Não'}] {spec['label']}", "good" if good else "bad"))
+        else:
+            value = float(value or 0)
+            good = value >= spec.get("threshold", float("-inf"))
+            items.append(__status_item(f"{spec['label']}: {__format_value(value, spec.get('unit', ''))}", "good" if good else "bad"))
+
+    return f"## {area.upper()}\n\n" + "".join(items)
+
+
+
+
+
+def __render_chemicals(record: dict) -> str:
+    """Químicos adicionados no turno em um único bloco, por grupo; apenas os com volume informado.
+
+    Args:
+        record (dict): Objeto da área de químicos.
+
+    Returns:
+        str: Bloco markdown/HTML dos químicos.
+    """
+    blocks = ["## Adição Químicos"]
+    for group, group_label in CHEMICAL_GROUPS.items():
+        blocks.append(layout.label(f"{group_label}:"))
+
+        items = [
+            __status_item(f"{spec['label']}: {__format_value(record[field], spec.get('unit', ''))}", "info")
+            for field, spec in schema.DISPLAY["quim"].items()
+            if field.startswith(f"{group}_") and float(record.get(field) or 0) != 0.0
+        ]
+        blocks.append("".join(items) if items else f"> Sem adição de químicos em {group_label}.")
+
+    return "\n\n".join(blocks)
+
+
+
+
+
+def __render_observations(record: dict) -> str:
+    """Observações preenchidas no turno em um único bloco.
+
+    Args:
+        record (dict): Objeto da área de observações.
+
+    Returns:
+        str: Bloco markdown das observações.
+    """
+    blocks = ["## Observações"]
+    for field in schema.fields_of_type("obs", "str"):
+        if record.get(field):
+            blocks.append(f"#### {schema.DISPLAY['obs'][field]['label']}:\n> {record[field]}")
+
+    if len(blocks) == 1:
+        blocks.append("Sem observações.")
+
+    return "\n\n".join(blocks)
 
 
 
 
 
 def __display_shift_info(query_eta: dict, query_etei: dict, query_obs: dict, query_quim: dict) -> None:
-    """Apresenta as informações de um turno na aplicação.
+    """Apresenta as informações de um turno na aplicação: um único bloco por área,
+    montado a partir dos metadados de apresentação do schema (db_fields.json).
 
     Args:
         query_eta (dict): Objeto resultante da busca no BD na coleção de fechamentos da ETA com os valores a serem apresentados na aplicação.
@@ -150,262 +747,24 @@ def __display_shift_info(query_eta: dict, query_etei: dict, query_obs: dict, que
         query_quim (dict): Objeto resultante da busca no BD na coleção de fechamentos de químicos com os valores a serem apresentados na aplicação.
     """
     # Verifica a ausência de registro
-    if (query_eta == None) | (query_eta["date"] == ""):
+    if query_eta is None or query_eta["date"] in (None, ""):
         st.write("## :warning: Busca não encontrada!")
+        return None
 
-    else:
-        # ETA, ETEI e OBS
-        try:
-            # dia, hora e turno da última modificação
-            col_mod, col_data, col_hora, col_turno, col_spare = st.columns([2, 1, 1, 1, 3])
-
-            with col_mod:
-                st.subheader("Última Modificação:\n\n")        
-            with col_data:
-                __spaces(1)
-                st.write(f"__Dia: {query_eta['date'].astimezone(pytz.timezone('America/Sao_Paulo')).strftime('%d/%m/%Y')}__")
-            with col_hora:
-                __spaces(1)
-                st.write(f"__Hora: {query_eta['date'].astimezone(pytz.timezone('America/Sao_Paulo')).strftime('%H:%M:%S')}__")
-            with col_turno:
-                __spaces(1)
-                st.write(f"__Turno: {query_eta['endedshift']}__")
-            with col_spare:
-                st.empty()
-
-            # Detalhes do turno selecinado
-            col_eta, col_etei, col_spare, col_quim, col_spare, col_obs = st.columns([4,4,1,4,1,5])
-
-            with col_eta:
-                __spaces(1)
-                st.write("## ETA")
-                # Itens
-                __spaces(1)
-                if query_eta["troca_filtro_polidor_1"]:
-                    st.success("[Sim] Troca Filtro Polidor 1")      # Sim: verde
-                else:
-                    st.error("[Não] Troca Filtro Polidor 1")        # Não: vermelho
-
-                __spaces(1)
-                if query_eta["troca_filtro_polidor_2"]:
-                    st.success("[Sim] Troca Filtro Polidor 2")      # Sim: verde
-                else:
-                    st.error("[Não] Troca Filtro Polidor 2")        # Não: vermelho
-
-                __spaces(1)
-                if query_eta["coluna_di_saturada_100"]:
-                    st.error("[Sim] Coluna DI Saturada 100")        # Sim: vermelho
-                else:
-                    st.success("[Não] Coluna DI Saturada 100")      # Não: verde
-
-                __spaces(1)
-                if query_eta["coluna_di_saturada_101"]:
-                    st.error("[Sim] Coluna DI Saturada 101")        # Sim: vermelho
-                else:
-                    st.success("[Não] Coluna DI Saturada 101")      # Não: verde
-
-                __spaces(1)
-                if query_eta["regenerar_100"]:
-                    st.error("[Sim] Necessário Regenerar 100")      # Sim: vermelho
-                else:
-                    st.success("[Não] Necessário Regenerar 100")    # Não: verde
-
-                __spaces(1)
-                if query_eta["regenerar_101"]:
-                    st.error("[Sim] Necessário Regenerar 101")      # Sim: vermelho
-                else:
-                    st.success("[Não] Necessário Regenerar 101")    # Não: verde
-                
-
-
-            with col_etei:
-                __spaces(1)
-                st.write("## ETEI")
-                # Itens
-                __spaces(1)
-                if query_etei["troca_filtro_polidor"]:
-                    st.success("[Sim] Troca do Filtro Polidor")     # Sim: verde
-                else:
-                    st.error("[Não] Troca do Filtro Polidor")       # Não: vermelho
-
-                __spaces(1)
-                if query_etei["dosou_antiespumante_mbr"]:
-                    st.error("[Sim] Dosou Antiespumante (MBR)")     # Sim: vermelho
-                else:
-                    st.success("[Não] Dosou Antiespumante (MBR)")   # Não: verde
-
-                __spaces(1)
-                if query_etei["envio_sanitario_mbr"]:
-                    st.success("[Sim] Envio Sanitária (MBR)")       # Sim: verde
-                else:
-                    st.error("[Não] Envio Sanitária (MBR)")         # Não: vermelho
-
-                __spaces(1)
-                if query_etei["transbordou_mbr"]:
-                    st.error("[Sim] Transbordo (MBR)")              # Sim: vermelho
-                else:
-                    st.success("[Não] Transbordo (MBR)")            # Não: verde
-
-                __spaces(1)
-                if query_etei["quebra_emulsao"]:
-                    st.success("[Sim] Quebra de Emulsão")           # Sim: verde
-                else:
-                    st.error("[Não] Quebra de Emulsão")             # Não: vermelho
-
-                __spaces(1)
-                if query_etei["nivel_silo_cal"] < 20:
-                    st.error(f"Nível do Silo de Cal: {query_etei['nivel_silo_cal']}%")      # < 20%: vermelho
-                else:
-                    st.success(f"Nível do Silo de Cal: {query_etei['nivel_silo_cal']}%")    # < 20%: verde
-
-            
-
-            with col_quim:
-                __spaces(1)
-                st.write("## Adição Químicos")
-                __spaces(1)
-                st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">ETA:</p>', unsafe_allow_html=True)
-                quim_eta = st.container()
-                __spaces(1)
-                st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">ETEI:</p>', unsafe_allow_html=True)
-                quim_etei = st.container()
-                __spaces(1)
-                st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">Área Comum:</p>', unsafe_allow_html=True)
-                quim_comum = st.container()
-
-
-            with col_spare:
-                st.empty()
-
-
-            with col_obs:
-                __spaces(1)
-                st.write("## Observações")
-
-                if ((query_obs["geral"] == "") and (query_obs["eta_etei"] == "") and (query_obs["quimicos"] == "")
-                and (query_obs["mbr_aeracao_sanitaria"] == "") and (query_obs["utilidades"] == "") and (query_obs["scrap_bulk"] == "")):
-                    st.write("Sem observações.")
-
-                else:
-                    if query_obs["geral"] != "":
-                        st.write("#### Gerais:")
-                        st.write(f'> {query_obs["geral"]}')
-                        __spaces(1)
-
-                    if query_obs["eta_etei"] != "":
-                        st.write("#### ETA / ETEI:")
-                        st.write(f'> {query_obs["eta_etei"]}')
-                        __spaces(1)
-                        
-                    if query_obs["quimicos"] != "":
-                        st.write("#### Químicos:")
-                        st.write(f'> {query_obs["quimicos"]}')
-                        __spaces(1)
-
-                    if query_obs["mbr_aeracao_sanitaria"] != "":
-                        st.write("#### MBR / Aeração / Sanitária:")
-                        st.write(f'> {query_obs["mbr_aeracao_sanitaria"]}')
-                        __spaces(1)
-
-                    if query_obs["utilidades"] != "":
-                        st.write("#### Utilidades:")
-                        st.write(f'> {query_obs["utilidades"]}')
-                        __spaces(1)
-
-                    if query_obs["scrap_bulk"] != "":
-                        st.write("#### Scrap / Bulk Systems:")
-                        st.write(f'> {query_obs["scrap_bulk"]}')
-                        __spaces(1)
-                
-        except AttributeError:
-            st.write(":warning: Busca não encontrada.")
-
-        
-    # Controle de Químicos
-    if (query_quim == None) | (query_quim["date"] == ""):
-        st.empty()
-    else:
-        try:
-            if ((float(query_quim["eta_biocida"]) == 0.0) and (float(query_quim["eta_antiincrustante"]) == 0.0)
-                    and (float(query_quim["eta_soda"]) == 0.0) and (float(query_quim["eta_metabissulfato"]) == 0.0)):
-                        quim_eta.write("> Sem adição de químicos na ETA.")
-        except TypeError:
-            quim_eta.write("> Sem adição de químicos na ETA.")
-
-        try:
-            if ((float(query_quim["etei_biocida"]) == 0.0) and (float(query_quim["etei_antiincrustante"]) == 0.0)
-                    and (float(query_quim["etei_hipoclorito"]) == 0.0) and (float(query_quim["etei_metabissulfato"]) == 0.0)):
-                        quim_etei.write("> Sem adição de químicos na ETEI.")
-        except TypeError:
-            quim_etei.write("> Sem adição de químicos na ETEI.")
+    # dia, hora e turno da última modificação
+    modified = query_eta["date"].astimezone(pytz.timezone("America/Sao_Paulo"))
+    st.markdown(
+        f"### Última Modificação: &nbsp; __Dia: {modified:%d/%m/%Y}__ &nbsp; "
+        f"__Hora: {modified:%H:%M:%S}__ &nbsp; __Turno: {query_eta['endedshift']}__"
+    )
 
-        try:
-            if ((float(query_quim["comuns_h2so4_50"]) == 0.0) and (float(query_quim["comuns_h2so4_98"]) == 0.0)
-                    and (float(query_quim["comuns_soda"]) == 0.0) and (float(query_quim["comuns_hipoclorito"]) == 0.0) and (float(query_quim["comuns_citrico"]) == 0.0)):
-                        quim_comum.write("> Sem adição de químicos nas Áreas Comuns")
-        except TypeError:
-            quim_comum.write("> Sem adição de químicos nas Áreas Comuns")
-            
-        try:
-            # ETA
-            if float(query_quim["eta_biocida"]) != 0.0:
-                quim_eta.info(f"Biocida: {query_quim['eta_biocida']} L")
-                __spaces(1)
-            
-            if float(query_quim["eta_antiincrustante"]) != 0.0:
-                quim_eta.info(f"Antiincrustante: {query_quim['eta_antiincrustante']} L")
-                __spaces(1)
-
-            if float(query_quim["eta_soda"]) != 0.0:
-                quim_eta.info(f"Soda: {query_quim['eta_soda']} L")
-                __spaces(1)
-
-            if float(query_quim["eta_metabissulfato"]) != 0.0:
-                quim_eta.info(f"Metabissulfato: {query_quim['eta_metabissulfato']} L")
-                __spaces(1)
-
-            # ETEI
-            if float(query_quim["etei_biocida"]) != 0.0:
-                quim_etei.info(f"Biocida: {query_quim['etei_biocida']} L")
-                __spaces(1)
-            
-            if float(query_quim["etei_antiincrustante"]) != 0.0:
-                quim_etei.info(f"Antiincrustante: {query_quim['etei_antiincrustante']} L")
-                __spaces(1)
-
-            if float(query_quim["etei_hipoclorito"]) != 0.0:
-                quim_etei.info(f"Hipoclorito: {query_quim['etei_hipoclorito']} L")
-                __spaces(1)
-
-            if float(query_quim["etei_metabissulfato"]) != 0.0:
-                quim_etei.info(f"Metabissulfato: {query_quim['etei_metabissulfato']} L")
-                __spaces(1)
-
-            # Áreas Comuns
-            if float(query_quim["comuns_h2so4_50"]) != 0.0:
-                quim_comum.info(f"H2SO4 (50%): {query_quim['comuns_h2so4_50']} L")
-                __spaces(1)
-            
-            if float(query_quim["comuns_h2so4_98"]) != 0.0:
-                quim_comum.info(f"H2SO4 (98%): {query_quim['comuns_h2so4_98']} L")
-                __spaces(1)
-
-            if float(query_quim["comuns_soda"]) != 0.0:
-                quim_comum.info(f"Soda: {query_quim['comuns_soda']} L")
-                __spaces(1)
-
-            if float(query_quim["comuns_hipoclorito"]) != 0.0:
-                quim_comum.info(f"Hipoclorito: {query_quim['comuns_hipoclorito']} L")
-                __spaces(1)
-
-            if float(query_quim["comuns_citrico"]) != 0.0:
-                quim_comum.info(f"Ácido Citrico: {query_quim['comuns_citrico']} L")
-                __spaces(1)
-
-        except KeyError:
-            st.write(":warning: Busca não encontrada!")
-        except TypeError:
-            st.write("")
+    # Detalhes do turno selecionado
+    col_eta, col_etei, _, col_quim, _, col_obs = st.columns([4, 4, 1, 4, 1, 5])
+    col_eta.markdown(__render_items("eta", query_eta), unsafe_allow_html=True)
+    col_etei.markdown(__render_items("etei", query_etei), unsafe_allow_html=True)
+    if query_quim is not None:
+        col_quim.markdown(__render_chemicals(query_quim), unsafe_allow_html=True)
+    col_obs.markdown(__render_observations(query_obs))
 
 
 
@@ -415,71 +774,138 @@ def _upload_shift_data(submit_args: dict) -> None:
     """Faz o upload de dados do turno selecionado para o banco de dados.
 
     Args:
-        submit_args (dict): Objeto com os valores a serem salvos.
+        submit_args (dict): Registros de cada área, já convertidos, indexados pelo identificador da área.
     """
-    submit_args = __parse_to_boolean(submit_args=submit_args)
     now = datetime.now().astimezone(pytz.timezone("America/Sao_Paulo"))
+    new_id = storage.new_doc_id(now)
 
-    new_id = now.strftime("%d%m%Y") + st.session_state.sft + str(random.randrange(1, 10**3)).zfill(4)  
-    for key in submit_args.keys():
-        submit_args[key]["date"] = now
+    # Envia para BD em um único commit atômico: ou as quatro áreas e o estado materializado
+    # do turno são gravados, ou nada é. O histórico completo continua nas coleções de fechamento.
+    records = {area: dict(submit_args[area], date=now, schema_version=schema.SCHEMA_VERSION) for area in schema.AREAS}
 
-    # Envia para BD
-    doc_ref_eta = db.collection(u"fechamento_eta").document(new_id)
-    doc_ref_eta.set(submit_args["ETA"])
+    # Como o registro mais recente prevalece, o estado do turno é o próprio registro inserido
+    state = dict(records, date=now, endedshift=st.session_state.sft)
+    db.commit_shift(new_id, records, __state_id(now, st.session_state.sft), state)
 
-    doc_ref_etei = db.collection(u"fechamento_etei").document(new_id)
-    doc_ref_etei.set(submit_args["ETEI"])
+    # O último turno da Home passa a ser o recém inserido e os rollups e os químicos das Análises mudaram
+    __latest_shift.clear()
+    __load_rollups.clear()
+    __load_chemicals.clear()
+    __shift_cache().invalidate(now.date(), st.session_state.sft)
 
-    doc_ref_obs = db.collection(u"fechamento_obs").document(new_id)
-    doc_ref_obs.set(submit_args["OBS"])
+    # Índice de busca das observações atualizado com o novo estado do turno. O turno já está gravado:
+    # uma falha no índice local não impede o envio e é corrigida com 'python cli.py fulltext-rebuild'.
+    # Índice ainda vazio é construído na primeira busca, já com este turno
+    try:
+        index = __open_fulltext()
+        if len(index) > 0:
+            index.update(__state_id(now, st.session_state.sft), records["obs"])
+    except Exception:
+        logging.getLogger(__name__).exception("Falha ao atualizar o índice de busca das observações")
 
-    doc_ref_quim = db.collection(u"fechamento_quim").document(new_id)
-    doc_ref_quim.set(submit_args["QUIM"])
 
 
 
 
+def __form_label(area: str, field: str) -> str:
+    """Rótulo de um campo no formulário: form_label, quando definido no schema, ou o label.
 
-def __conflito_checkboxes() -> bool:
-    """Verifica se há conflito nas marcações dos checkboxes.
+    Args:
+        area (str): Identificador da área.
+        field (str): Campo.
 
     Returns:
-        bool: True se houver algum conflito. False se estiver tudo ok.
+        str: Rótulo.
     """
-    for area in ["eta", "etei"]:
-        with open("db_fields.json", mode="r") as file:
-            fields_json = json.load(file)
-            keys = dict.fromkeys(fields_json[area])
-
-        for key in keys:
-            if key not in ["id", "date", "endedshift", "silo_cal"]:
-                if st.session_state[f"{key}_sim"] and st.session_state[f"{key}_nao"]:
-                    return True 
-                elif not st.session_state[f"{key}_sim"] and not st.session_state[f"{key}_nao"]:
-                    return True 
-                
-        return False
+    return schema.DISPLAY[area][field].get("form_label", schema.DISPLAY[area][field]["label"])
 
 
 
 
 
-def __parse_str_to_float(string: str) -> float:
-    """Converte a string proveniente do text_input para float.
+def __form_field(area: str, field: str) -> None:
+    """Widget do formulário para um campo, conforme o seu tipo no schema. A chave do widget é o nome do campo.
 
     Args:
-        string (str): String contendo um valor float.
+        area (str): Identificador da área.
+        field (str): Campo.
+    """
+    label, field_type = __form_label(area, field), schema.TYPES[area][field]
+    unit = schema.DISPLAY[area][field].get("unit", "")
+
+    if field_type == "bool":
+        st.radio(label=label, options=["Sim", "Não"], index=None, horizontal=True, key=field)
+    elif field_type == "float":
+        st.text_input(
+            label=f"{label} (%)" if unit == "%" else label,
+            placeholder="0 - 100" if unit == "%" else f"Qtde ({unit.lower()})", key=field,
+        )
+    else:
+        st.text_area(label=label, placeholder=f"Observações {label}", key=field)
+
+
+
+
+
+def __build_submission() -> tuple:
+    """Valida o formulário e monta os registros de cada área em uma única passagem pelo schema.
+    Todos os campos numéricos são convertidos de uma vez (aceitando vírgula decimal e '%').
 
     Returns:
-        float: Valor flutuante a ser utilizado.
+        tuple: Registros de cada área (dict, indexado pelo identificador da área) e erros (list de str).
     """
-    try:
-        return float(string.replace(',', '.').replace('%', ''))
-    except ValueError:
-        if string == "":
-            return 0
-    
+    errors = []
+    if st.session_state.id == "":
+        errors.append("Identificação não informada!")
+    if st.session_state.sft == "Selecione":
+        errors.append("Turno não selecionado!")
+
+    floats = [(area, field) for area in schema.AREAS for field in schema.fields_of_type(area, "float")]
+    raw = pd.Series([st.session_state[field] for _, field in floats], dtype=object).str.strip()
+    numbers = pd.to_numeric(raw.str.replace(",", ".").str.rstrip("%").replace("", "0"), errors="coerce")
+    parsed = dict(zip((field for _, field in floats), numbers))
+
+    records = {}
+    for area in schema.AREAS:
+        record = {"id": st.session_state.id, "endedshift": st.session_state.sft}
+        for field in schema.FIELDS[area]:
+            if field in schema.META_FIELDS:
+                continue
+            field_type, value = schema.TYPES[area][field], st.session_state[field]
+
+            if field_type == "bool":
+                if value is None:
+                    errors.append(f"Marcação pendente: {__form_label(area, field)}")
+                record[field] = value == "Sim"
+            elif field_type == "float":
+                if schema.DISPLAY[area][field].get("required") and value.strip() == "":
+                    errors.append(f"{__form_label(area, field)} não informado!")
+                elif pd.isna(parsed[field]):
+                    name = __form_label(area, field)
+                    if area == "quim":
+                        name = f"{CHEMICAL_GROUPS[field.split('_')[0]]} - {name}"
+                    errors.append(f"Valor inválido em {name}: {value}")
+                record[field] = float(parsed[field])
+            else:
+                record[field] = value
+        records[area] = record
+
+    return records, errors
+
+
+
+
+
+def __clear_form() -> None:
+    """Limpa todos os campos do formulário, a partir do schema.
+    """
+    st.session_state.id = ""
+    st.session_state.sft = "Selecione"
+    for area in schema.AREAS:
+        for field in schema.FIELDS[area]:
+            if field not in schema.META_FIELDS:
+                st.session_state[field] = None if schema.TYPES[area][field] == "bool" else ""
+
 
 
 
@@ -487,97 +913,19 @@ def __parse_str_to_float(string: str) -> float:
 def __submit_callback() -> None:
     """Callback Function para o Submit do Forms para Inserir Dados.
     """
-    if st.session_state.id == "":
-        st.error("Identificação não informada!")
-    elif st.session_state.sft == "Selecione":
-        st.error("Turno não selecionado!")
-    elif st.session_state.silo_cal == "":
-        st.error("Nível de Silo de Cal não informado!")
-    elif __conflito_checkboxes():
-        st.error("Marcação conflitante!")
-
-    else:   
-        submit_args = {
-            "ETA": {
-                "id": st.session_state.id,
-                "endedshift": st.session_state.sft,
-                "coluna_di_saturada_100": st.session_state.coluna_di_saturada_100_sim,
-                "coluna_di_saturada_101": st.session_state.coluna_di_saturada_101_sim,
-                "regenerar_100": st.session_state.regenerar_100_sim,
-                "regenerar_101": st.session_state.regenerar_101_sim,
-                "troca_filtro_polidor_1": st.session_state.troca_filtro_polidor_1_sim,
-                "troca_filtro_polidor_2": st.session_state.troca_filtro_polidor_2_sim,
-            },
-            "ETEI": {
-                "id": st.session_state.id,
-                "endedshift": st.session_state.sft,
-                "dosou_antiespumante_mbr": st.session_state.dosou_antiespumante_mbr_sim,
-                "envio_sanitario_mbr": st.session_state.envio_sanitario_mbr_sim,
-                "transbordou_mbr": st.session_state.transbordou_mbr_sim,
-                "troca_filtro_polidor": st.session_state.troca_filtro_polidor_sim,
-                "quebra_emulsao": st.session_state.quebra_emulsao_sim,
-                "nivel_silo_cal": __parse_str_to_float(st.session_state.silo_cal),
-            },
-            "OBS": {
-                "id": st.session_state.id,
-                "endedshift": st.session_state.sft,
-                "geral": st.session_state.obs_geral,
-                "eta_etei": st.session_state.obs_eta_etei,
-                "quimicos": st.session_state.obs_quim,
-                "mbr_aeracao_sanitaria": st.session_state.obs_mbr_aeracao_sanitaria,
-                "utilidades": st.session_state.obs_utilidades,
-                "scrap_bulk": st.session_state.obs_scrap_bulk
-            },
-            "QUIM": {
-                "id": st.session_state.id,
-                "endedshift": st.session_state.sft,
-                "eta_biocida": __parse_str_to_float(st.session_state.eta_biocida),
-                "eta_antiincrustante": __parse_str_to_float(st.session_state.eta_antiincrustante),
-                "eta_soda": __parse_str_to_float(st.session_state.eta_soda),
-                "eta_metabissulfato": __parse_str_to_float(st.session_state.eta_metabissulfato),
-                "etei_biocida": __parse_str_to_float(st.session_state.etei_biocida),
-                "etei_antiincrustante": __parse_str_to_float(st.session_state.etei_antiincrustante),
-                "etei_hipoclorito": __parse_str_to_float(st.session_state.etei_hipoclorito),
-                "etei_metabissulfato": __parse_str_to_float(st.session_state.etei_metabissulfato),
-                "comuns_h2so4_50": __parse_str_to_float(st.session_state.comuns_h2so4_50),
-                "comuns_h2so4_98": __parse_str_to_float(st.session_state.comuns_h2so4_98),
-                "comuns_soda": __parse_str_to_float(st.session_state.comuns_soda),
-                "comuns_hipoclorito": __parse_str_to_float(st.session_state.comuns_hipoclorito),
-                "comuns_citrico": __parse_str_to_float(st.session_state.comuns_citrico)
-            }
-        }
-
-        
-        # Sobe os dados do turno para o banco de dados
-        _upload_shift_data(submit_args)
-
-        # Mensagem de sucesso
-        st.success("Dados enviados com sucesso!")
-        
-        # Limpar os campos de se inserir dados
-        clear_list_1 = ["id", "sft", "silo_cal", "obs_geral", "obs_eta_etei", 
-        "obs_quim", "obs_mbr_aeracao_sanitaria", "obs_utilidades", "obs_scrap_bulk",
-        "eta_biocida", "eta_antiincrustante", "eta_soda", "eta_metabissulfato", "etei_biocida",
-        "etei_antiincrustante", "etei_hipoclorito", "etei_metabissulfato", "comuns_h2so4_50",
-        "comuns_h2so4_98", "comuns_soda", "comuns_hipoclorito", "comuns_citrico"]
-        clear_list_2 = ["coluna_di_saturada_100", "coluna_di_saturada_101", "regenerar_100",
-        "regenerar_101", "troca_filtro_polidor_1", "troca_filtro_polidor_2", "dosou_antiespumante_mbr",
-        "envio_sanitario_mbr", "transbordou_mbr", "troca_filtro_polidor", "quebra_emulsao"]
-
-        for key in clear_list_1:
-            if key not in st.session_state.keys():
-                st.error("Chave inexistente")
-            elif key == "sft":
-                st.session_state[key] = "Selecione"
-            else:
-                st.session_state[key] = ""
+    submit_args, errors = __build_submission()
+    if errors:
+        st.error("\n".join(f"- {error}" for error in errors))
+        return None
 
-        for key in clear_list_2:
-            if f"{key}_sim" not in st.session_state.keys():
-                st.error("Erro ao limpar formulário: chave inexistente.")
-            else:
-                st.session_state[f"{key}_sim"] = False
-                st.session_state[f"{key}_nao"] = False
+    # Sobe os dados do turno para o banco de dados
+    _upload_shift_data(submit_args)
+
+    # Mensagem de sucesso
+    st.success("Dados enviados com sucesso!")
+
+    # Limpar os campos de se inserir dados
+    __clear_form()
 
 
 
@@ -590,21 +938,19 @@ def __search_callback(home: bool=False) -> None:
     Args:
         home (bool, optional): Opção para identificar a busca específica para a Home. Defaults to False.
     """
-    # Busca todos os dados da data e turno escolhidos
+    # Busca e junta todos os dados da data e turno escolhidos
     try:
-        query_eta = __query(area="eta", home=home)
-        query_etei = __query(area="etei", home=home)
-        query_obs = __query(area="obs", home=home)
-        query_quim = __query(area="quim", home=home)
+        # Filtros da busca são lidos aqui: o session_state não é acessível nas threads de busca
+        if home:
+            date_query, shift = __latest_shift()
+        else:
+            date_query = datetime.strptime(f"{st.session_state.date_search}", "%Y-%m-%d")
+            shift = st.session_state.sft_search
 
-        # junta todas as informações
-        merged_query_eta = __merge_docs(area="eta", query=query_eta)
-        merged_query_etei = __merge_docs(area="etei", query=query_etei)
-        merged_query_obs = __merge_docs(area="obs", query=query_obs)
-        merged_query_quim = __merge_docs(area="quim", query=query_quim)
+        shift_data = __load_shift(date_query=date_query, shift=shift)
 
         # mostra as informações na tela
-        __display_shift_info(merged_query_eta, merged_query_etei, merged_query_obs, merged_query_quim)
+        __display_shift_info(shift_data["eta"], shift_data["etei"], shift_data["obs"], shift_data["quim"])
     
     except IndexError:
         st.write(":warning: Estamos passando por mudanças no Banco. Por favor, fique à vontade para inserir dados do turno.")
@@ -616,200 +962,192 @@ def __search_callback(home: bool=False) -> None:
     
 
 
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def __live_home(live: LiveShift) -> None:
+    """Apresenta o turno mais recente recebido pelo listener, reexecutada periodicamente sem o restante da página.
+
+    Args:
+        live (LiveShift): Estado em tempo real.
+    """
+    # Listener encerrado: a página inteira é executada novamente e a Home volta a ler do banco
+    if not live.is_active():
+        st.rerun()
+
+    _, state = live.snapshot()
+    __display_shift_info(*(
+        __format_record(area, state.get(area, {}), schema.projection(area, "display")) for area in schema.AREAS
+    ))
+
+
+
+
+
+def __home() -> None:
+    """Home: o turno mais recente em tempo real quando o banco oferece listeners (Firestore),
+    ou buscado a cada rerun nos demais.
+    """
+    live = __live_shift()
+    if live is not None and not live.is_active():
+        # Listener encerrado: a Home lê do banco e a próxima execução assina novamente
+        __live_shift.clear()
+        live = None
+
+    if live is None or live.snapshot()[1] is None:
+        __search_callback(home=True)
+        return None
+
+    __live_home(live)
+
+
+
+
+
 def __inserir_dados() -> None:
     """Estrutura de Formulário para inserir novos dados de turno para o Banco de Dados.
     """
     # Header
     st.header("Inserir Dados")
 
-    col_id, col_shift, col_empty  = st.columns([1,1,5])
+    # Colunas vazias apenas ocupam espaço no layout, sem elementos
+    col_id, col_shift, _ = st.columns([1,1,5])
     with col_id:
         st.text_input(label="ID", placeholder="Insira seu ID", key="id")
     with col_shift:
         st.selectbox(label="Turno: ", options=["Selecione", "A", "B", "C"], key="sft")
-    with col_empty:
-        st.empty()    
-    
-    # Forms
-    with st.form(key='form_in', clear_on_submit=False):
-        col_eta, col_eta_check_sim, col_eta_check_nao, col_empty1, \
-            col_etei, col_etei_check_sim, col_etei_check_nao = st.columns([2,1,1,1,2,1,1])
-        # Coluna da ETA
-        with col_eta:
-            st.header("ETA")
-            __spaces(2)
-            st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">Troca do Filtro Polidor 1</p>', unsafe_allow_html=True)
-            __spaces(2)
-            st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">Troca do Filtro Polidor 2</p>', unsafe_allow_html=True)  
-            __spaces(2)
-            st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">Coluna DI Saturada 100</p>', unsafe_allow_html=True)
-            __spaces(2)
-            st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">Coluna DI Saturada 101</p>', unsafe_allow_html=True)
-            __spaces(2)
-            st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">Necessário Regenerar 100</p>', unsafe_allow_html=True)
-            __spaces(2)
-            st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">Necessário Regenerar 101</p>', unsafe_allow_html=True)
-
-        with col_eta_check_sim:      
-            __spaces(7)   
-            st.checkbox(label="Sim", value=False, key="troca_filtro_polidor_1_sim")
-            __spaces(3) 
-            st.checkbox(label="Sim", value=False, key="troca_filtro_polidor_2_sim")
-            __spaces(2) 
-            st.checkbox(label="Sim", value=False, key="coluna_di_saturada_100_sim")
-            __spaces(3) 
-            st.checkbox(label="Sim", value=False, key="coluna_di_saturada_101_sim")
-            __spaces(2) 
-            st.checkbox(label="Sim", value=False, key="regenerar_100_sim")
-            __spaces(3) 
-            st.checkbox(label="Sim", value=False, key="regenerar_101_sim")
-
-        with col_eta_check_nao:
-            __spaces(7)   
-            st.checkbox(label="Não", value=False, key="troca_filtro_polidor_1_nao")
-            __spaces(3) 
-            st.checkbox(label="Não", value=False, key="troca_filtro_polidor_2_nao")
-            __spaces(2)
-            st.checkbox(label="Não", value=False, key="coluna_di_saturada_100_nao")
-            __spaces(3)
-            st.checkbox(label="Não", value=False, key="coluna_di_saturada_101_nao")
-            __spaces(2)
-            st.checkbox(label="Não", value=False, key="regenerar_100_nao")
-            __spaces(3)
-            st.checkbox(label="Não", value=False, key="regenerar_101_nao")
-
-        with col_empty1:
-            st.empty()
-
-
-        # Coluna da ETEI
-        with col_etei:
-            st.header("ETEI")
-            __spaces(2)
-            st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">Dosou Antiespumante MBR</p>', unsafe_allow_html=True)
-            __spaces(2)
-            st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">Envio Sanitário MBR</p>', unsafe_allow_html=True)
-            __spaces(2)
-            st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">Transbordou MBR</p>', unsafe_allow_html=True)
-            __spaces(2)
-            st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">Troca do Filtro Polidor</p>', unsafe_allow_html=True)
-            __spaces(2)
-            st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">Houve Quebra de Emulsão</p>', unsafe_allow_html=True)
-            __spaces(2)
-            st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">Nível do Silo de Cal (%)</p>', unsafe_allow_html=True)
-
-        with col_etei_check_sim:      
-            __spaces(7)   
-            st.checkbox(label="Sim", value=False, key="dosou_antiespumante_mbr_sim")
-            __spaces(3) 
-            st.checkbox(label="Sim", value=False, key="envio_sanitario_mbr_sim")
-            __spaces(2) 
-            st.checkbox(label="Sim", value=False, key="transbordou_mbr_sim")
-            __spaces(3) 
-            st.checkbox(label="Sim", value=False, key="troca_filtro_polidor_sim")
-            __spaces(2) 
-            st.checkbox(label="Sim", value=False, key="quebra_emulsao_sim")
-
-            st.text_input(label="", placeholder="0 - 100", key="silo_cal")
-
-        with col_etei_check_nao:      
-            __spaces(7)   
-            st.checkbox(label="Não", value=False, key="dosou_antiespumante_mbr_nao")
-            __spaces(3) 
-            st.checkbox(label="Não", value=False, key="envio_sanitario_mbr_nao")
-            __spaces(2) 
-            st.checkbox(label="Não", value=False, key="transbordou_mbr_nao")
-            __spaces(3) 
-            st.checkbox(label="Não", value=False, key="troca_filtro_polidor_nao")
-            __spaces(2) 
-            st.checkbox(label="Não", value=False, key="quebra_emulsao_nao")
 
+    # Forms: um widget por campo do schema
+    with st.form(key='form_in', clear_on_submit=False):
+        col_eta, _, col_etei = st.columns([3, 1, 3])
+        for area, column in (("eta", col_eta), ("etei", col_etei)):
+            with column:
+                st.header(area.upper())
+                for field in schema.FIELDS[area]:
+                    if field not in schema.META_FIELDS:
+                        __form_field(area, field)
 
 
         # Controle de Quimicos
-        __spaces(3)
-        st.subheader("Controle de Adição de Químicos")  
-
-        col_quim_eta1, col_quim_eta2, col_empty, col_quim_etei1, \
-            col_quim_etei2, col_empty, col_quim_comuns1, col_quim_comuns2 = st.columns([2,2,1,2,2,1,2,2])
-
-
-        with col_quim_eta1:
-            __spaces(2)
-            st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">ETA</p>', unsafe_allow_html=True)
-            st.text_input(label="Biocida", placeholder="Qtde (l)", key="eta_biocida")
-            __spaces(1)
-            st.text_input(label="Antiincrustante", placeholder="Qtde (l)", key="eta_antiincrustante")
-
-        with col_quim_eta2:
-            __spaces(5)
-            st.text_input(label="Soda", placeholder="Qtde (l)", key="eta_soda")
-            __spaces(1)
-            st.text_input(label="Metabissulfato", placeholder="Qtde (l)", key="eta_metabissulfato")
-
-        with col_empty:
-            st.empty()
-
-        with col_quim_etei1:
-            __spaces(2)
-            st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">ETEI</p>', unsafe_allow_html=True)
-            st.text_input(label="Biocida", placeholder="Qtde (l)", key="etei_biocida")
-            __spaces(1)
-            st.text_input(label="Antiincrustante", placeholder="Qtde (l)", key="etei_antiincrustante")
-
-        with col_quim_etei2:
-            __spaces(5)
-            st.text_input(label="Hipoclorito", placeholder="Qtde (l)", key="etei_hipoclorito")
-            __spaces(1)
-            st.text_input(label="Metabissulfato", placeholder="Qtde (l)", key="etei_metabissulfato")
-
-        with col_empty:
-            st.empty()
-
-        with col_quim_comuns1:
-            __spaces(2)
-            st.write('<p style="font-family:Roboto:wght@100; letter-spacing:.7px; font-size: 20px;">Áreas Comuns</p>', unsafe_allow_html=True)
-            st.text_input(label="H2SO4 (50%)", placeholder="Qtde (l)", key="comuns_h2so4_50")
-            __spaces(1)
-            st.text_input(label="H2SO4 (98%)", placeholder="Qtde (l)", key="comuns_h2so4_98")
-
-        with col_quim_comuns2:
-            __spaces(5)
-            st.text_input(label="Soda", placeholder="Qtde (l)", key="comuns_soda")
-            __spaces(1)
-            st.text_input(label="Hipoclorito", placeholder="Qtde (l)", key="comuns_hipoclorito")
-            __spaces(1)
-            st.text_input(label="Ácido Cítrico", placeholder="Qtde (l)", key="comuns_citrico")
-        
+        with layout.section("quimicos"):
+            st.subheader("Controle de Adição de Químicos")
+
+            for (group, group_label), column in zip(CHEMICAL_GROUPS.items(), st.columns(len(CHEMICAL_GROUPS))):
+                with column:
+                    st.markdown(layout.label(group_label), unsafe_allow_html=True)
+                    for field in schema.fields_of_type("quim", "float"):
+                        if field.startswith(f"{group}_"):
+                            __form_field("quim", field)
+
 
         # Observações
-        __spaces(3)
-        st.subheader("Observações")        
-        
-        col_obs_1, col_empty3, col_obs_2 = st.columns([6,1,6])
-
-        # Coluna 1 Observações
-        with col_obs_1:
-            st.text_area("Gerais", placeholder="Observações Gerais", key="obs_geral")
-            __spaces(1)
-            st.text_area("ETA / ETEI", placeholder="Observações ETA / ETEI", key="obs_eta_etei")
-            __spaces(1)
-            st.text_area("Produtos Químicos", placeholder="Observações Químicos", key="obs_quim")
-
-        with col_empty3:
-            st.empty()
-
-        # Coluna 2 Observações
-        with col_obs_2:
-            st.text_area("MBR / Aeração / Sanitária", placeholder="Observações MBR / Aeração / Sanitária", key="obs_mbr_aeracao_sanitaria")
-            __spaces(1)
-            st.text_area("Utilidades", placeholder="Observações Utilidades", key="obs_utilidades")            
-            __spaces(1)
-            st.text_area("Scrap / Bulk System", placeholder="Observações Scrap / Bulk System", key="obs_scrap_bulk")
-
-        __spaces(2)
+        with layout.section("observacoes"):
+            st.subheader("Observações")
+
+            fields = schema.fields_of_type("obs", "str")
+            half = (len(fields) + 1) // 2
+            col_obs_1, _, col_obs_2 = st.columns([6,1,6])
+            for column, column_fields in ((col_obs_1, fields[:half]), (col_obs_2, fields[half:])):
+                with column:
+                    for field in column_fields:
+                        __form_field("obs", field)
+
         # Botão de Envio do Forms para o BD
-        st.form_submit_button(label="Enviar", on_click=__submit_callback)
+        with layout.section("enviar", kind="acao"):
+            st.form_submit_button(label="Enviar", on_click=__submit_callback)
+
+
+
+
+
+def __buscar_periodo() -> None:
+    """Estrutura no menu lateral para a busca por período, com um ou mais turnos.
+    A primeira página é apresentada de imediato e as seguintes são buscadas sob demanda.
+    Os turnos encontrados são listados em uma tabela e os detalhes só são apresentados para o turno escolhido.
+    """
+    today = datetime.now().astimezone(pytz.timezone("America/Sao_Paulo")).date()
+    st.sidebar.date_input("Período", value=(today - timedelta(days=7), today), key="range_search")
+    st.sidebar.multiselect(label="Turnos", options=["A", "B", "C"], key="sfts_search", placeholder="Todos")
+    st.sidebar.number_input(
+        label="Registros por página", min_value=10, max_value=1000, value=RANGE_PAGE_SIZE, step=10, key="range_page_size"
+    )
+    st.sidebar.button(label="Buscar", key="range_button")
+    if len(st.session_state.range_search) == 2:
+        start_date, end_date = st.session_state.range_search
+        st.sidebar.download_button(
+            label="Exportar período (CSV)", data=partial(__export_range, start_date, end_date),
+            file_name=f"fechamentos_{start_date:%Y%m%d}_{end_date:%Y%m%d}.csv", mime="text/csv",
+            on_click="ignore", key="range_export",
+        )
+
+    # A busca (filtros, cursores e turnos carregados) fica na sessão para as páginas seguintes
+    if st.session_state.range_button:
+        if len(st.session_state.range_search) != 2:
+            st.sidebar.error("Selecione a data final do período.")
+            return None
+        st.session_state.range_state = __new_range_search(
+            *st.session_state.range_search, st.session_state.sfts_search, st.session_state.range_page_size
+        )
+        __load_range_page(st.session_state.range_state)
+
+    search = st.session_state.get("range_state")
+    if search is None:
+        return None
+
+    if search["pending"] and st.session_state.get("range_more"):
+        __load_range_page(search)
+
+    results = dict(sorted(search["results"].items()))
+    if not results:
+        st.write("## :warning: Busca não encontrada!")
+        return None
+
+    st.dataframe(
+        pd.DataFrame([__shift_summary(key, shift_data) for key, shift_data in results.items()]),
+        hide_index=True, width="stretch",
+    )
+    if search["pending"]:
+        st.button(label="Carregar mais", key="range_more")
+
+    choice = st.selectbox(
+        label="Detalhes do turno", options=list(results), index=None, placeholder="Selecione",
+        format_func=lambda key: f"{key[0].strftime('%d/%m/%Y')} - Turno {key[1]}", key="range_detail",
+    )
+    if choice is not None:
+        __display_shift_info(*(results[choice][area] for area in schema.AREAS))
+
+
+
+
+
+def __buscar_palavra() -> None:
+    """Estrutura no menu lateral para a busca por palavras-chave nas observações de todos os turnos.
+    Os turnos encontrados são listados por relevância e os detalhes só são apresentados para o turno escolhido.
+    """
+    st.sidebar.text_input(label="Palavras-chave", placeholder="Ex.: bomba soda", key="text_search")
+
+    hits = __get_fulltext().search(st.session_state.text_search) if st.session_state.text_search else None
+    if hits is None:
+        return None
+    if not hits:
+        st.write("## :warning: Busca não encontrada!")
+        return None
+
+    # Um único bloco de texto para todos os resultados
+    st.markdown("\n\n".join(
+        f"**{datetime.strptime(hit['day'], '%Y-%m-%d').strftime('%d/%m/%Y')} - Turno {hit['endedshift']}** "
+        f"({schema.DISPLAY['obs'][hit['field']]['label']}): {hit['snippet']}"
+        for hit in hits
+    ))
+
+    choice = st.selectbox(
+        label="Detalhes do turno", options=range(len(hits)), index=None, placeholder="Selecione",
+        format_func=lambda i: f"{datetime.strptime(hits[i]['day'], '%Y-%m-%d').strftime('%d/%m/%Y')} - Turno {hits[i]['endedshift']}",
+        key="text_detail",
+    )
+    if choice is not None:
+        shift_data = __load_shift(
+            date_query=datetime.strptime(hits[choice]["day"], "%Y-%m-%d"), shift=hits[choice]["endedshift"]
+        )
+        __display_shift_info(shift_data["eta"], shift_data["etei"], shift_data["obs"], shift_data["quim"])
 
 
 
@@ -822,6 +1160,14 @@ def __buscar_dados() -> None:
     # Menu lateral para busca
     st.sidebar.write("")
     st.sidebar.write("\n\nFaça sua busca:\n\n")
+    st.sidebar.radio(label="Buscar por", options=["Dia e turno", "Período", "Palavra-chave"], key="search_mode", horizontal=True)
+    if st.session_state.search_mode == "Período":
+        __buscar_periodo()
+        return None
+    elif st.session_state.search_mode == "Palavra-chave":
+        __buscar_palavra()
+        return None
+
     st.sidebar.date_input("Data", key="date_search")
     st.sidebar.selectbox(label="Turno", options=["Selecione", "A", "B", "C"], key="sft_search")
     st.sidebar.button(label="Buscar", key="search_button")
@@ -834,22 +1180,150 @@ def __buscar_dados() -> None:
 
 
 
+@st.cache_data(ttl=600, show_spinner=False)
+def __load_chemicals(start_date, end_date) -> pd.DataFrame:
+    """Carrega em um DataFrame colunar os fechamentos de químicos de um período, um turno por linha.
+
+    Args:
+        start_date (date): Primeiro dia do período.
+        end_date (date): Último dia do período.
+
+    Returns:
+        pd.DataFrame: Colunas 'dia', 'turno' e uma coluna por químico, com os volumes em litros.
+    """
+    tz = pytz.timezone("America/Sao_Paulo")
+    start = tz.localize(datetime.combine(start_date, datetime.min.time()))
+    end = tz.localize(datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+
+    chemicals = list(schema.fields_of_type("quim", "float"))
+    fields = ("date", "endedshift", *chemicals)
+    frame = pd.DataFrame(list(db.query_range("quim", start, end, fields)), columns=fields)
+
+    frame[chemicals] = frame[chemicals].apply(pd.to_numeric, errors="coerce").fillna(0.0)
+    frame["date"] = pd.to_datetime(frame["date"], utc=True).dt.tz_convert(tz)
+    frame["dia"] = frame["date"].dt.tz_localize(None).dt.normalize()
+
+    # O registro mais recente de cada turno prevalece, como na Home e na Busca
+    frame = frame.sort_values("date").drop_duplicates(["dia", "endedshift"], keep="last")
+
+    return frame.rename(columns={"endedshift": "turno"})[["dia", "turno", *chemicals]].reset_index(drop=True)
+
+
+
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def __load_rollups(period: str, start_date, end_date) -> pd.DataFrame:
+    """Carrega os rollups pré-agregados de um período: uma linha por dia, semana ou mês.
+
+    Args:
+        period (str): 'day', 'week' ou 'month'.
+        start_date (date): Primeiro dia do período.
+        end_date (date): Último dia do período.
+
+    Returns:
+        pd.DataFrame: Uma coluna por métrica (químicos, eventos e 'turnos'), indexada pela chave do período.
+    """
+    start_key = storage.rollup_keys(f"{start_date.isoformat()}_")[period]
+    end_key = storage.rollup_keys(f"{end_date.isoformat()}_")[period]
+    columns = ["key", "turnos", *storage.ROLLUP_METRICS]
+
+    frame = pd.DataFrame(db.get_rollups(period, start_key, end_key), columns=columns)
+
+    return frame.set_index("key").fillna(0.0)
+
+
+
+
+
+def __analises() -> None:
+    """Seção de análises: consumo de químicos e eventos por turno, dia, semana ou mês, por área e médias móveis.
+    Dia, semana e mês são lidos dos rollups; apenas a agregação por turno lê os registros.
+    """
+    st.header("Análises")
+
+    today = datetime.now().astimezone(pytz.timezone("America/Sao_Paulo")).date()
+    col_periodo, col_agregacao, col_janela, _ = st.columns([2, 1, 1, 3])
+    with col_periodo:
+        periodo = st.date_input("Período", value=(today - timedelta(days=30), today), key="analytics_period")
+    with col_agregacao:
+        agregacao = st.selectbox("Agregação", options=["Dia", "Semana", "Mês", "Turno"], key="analytics_period_type")
+    with col_janela:
+        janela = st.number_input("Média móvel (períodos)", min_value=1, max_value=90, value=7, key="analytics_window")
+
+    if len(periodo) != 2:
+        st.write("Selecione a data final do período.")
+        return None
+
+    if agregacao == "Turno":
+        frame = __load_chemicals(*periodo)
+    else:
+        frame = __load_rollups({"Dia": "day", "Semana": "week", "Mês": "month"}[agregacao], *periodo)
+
+    if frame.empty:
+        st.write(":warning: Sem registros no período.")
+        return None
+
+    if agregacao == "Turno":
+        frame.index = frame["dia"].dt.strftime("%d/%m/%Y") + " - " + frame["turno"].astype(str)
+
+    chemicals = list(schema.fields_of_type("quim", "float"))
+    labels = {
+        field: f"{CHEMICAL_GROUPS[field.split('_')[0]]} - {schema.DISPLAY['quim'][field]['label']}"
+        for field in chemicals
+    }
+
+    consumo = frame[chemicals]
+    rolling = consumo.rolling(janela, min_periods=1).mean()
+
+    # Totais por área: soma das colunas com o mesmo prefixo (eta_, etei_, comuns_)
+    by_area = consumo.T.groupby(lambda field: CHEMICAL_GROUPS[field.split("_")[0]]).sum().T
+
+    tab_area, tab_media, tab_total, tab_eventos = st.tabs(["Por área", "Média móvel", "Totais", "Eventos"])
+    with tab_area:
+        st.subheader(f"Consumo por área (L) - {agregacao}")
+        st.line_chart(by_area)
+        st.dataframe(by_area.sum().rename("Total (L)").to_frame())
+    with tab_media:
+        st.subheader(f"Média móvel de {janela} períodos por químico (L)")
+        st.line_chart(rolling.rename(columns=labels))
+    with tab_total:
+        st.subheader(f"Consumo por químico (L) - {agregacao}")
+        st.dataframe(consumo.rename(columns=labels))
+    with tab_eventos:
+        if agregacao == "Turno":
+            st.write("Eventos disponíveis nas agregações por dia, semana ou mês.")
+        else:
+            # Quantidade de turnos com 'Sim' em cada evento da ETA e ETEI
+            events = [field for field, area in storage.ROLLUP_METRICS.items() if area != "quim"]
+            st.subheader(f"Turnos com ocorrência - {agregacao}")
+            st.dataframe(frame[["turnos", *events]].rename(
+                columns={field: schema.DISPLAY[storage.ROLLUP_METRICS[field]][field]["label"] for field in events}
+            ).astype(int))
+
+
+
+
+
 def main() -> None:
     """Função principal para guia de execuções na aplicação.
     """
 
+    layout.apply_styles()
     st.title("Diário de Turno - Meio Ambiente")
 
     # Side menu
-    menu = ['Home', 'Inserir', 'Buscar']
+    menu = ['Home', 'Inserir', 'Buscar', 'Análises']
     choice = st.sidebar.selectbox("Menu", menu)
 
     if choice == "Home":
-        __search_callback(home=True)
+        __home()
     elif choice == "Inserir":
         __inserir_dados()
     elif choice == "Buscar":
         __buscar_dados()
+    elif choice == "Análises":
+        __analises()
 
 
 
@@ -0,0 +1,116 @@
+"""Conta as mensagens delta (elementos e blocos) que cada página envia ao navegador, com o AppTest do Streamlit.
+
+Cada nó da árvore do AppTest corresponde a uma mensagem delta da execução da página. Para comparar
+com uma versão anterior, crie um worktree dela e informe os dois app.py:
+
+    git worktree add /tmp/antes <commit>
+    python bench_layout.py /tmp/antes/app.py app.py
+
+As páginas são executadas sobre um banco SQLite temporário com um turno de exemplo.
+"""
+## IMPORTS
+import argparse
+import os
+import sqlite3
+import tempfile
+from datetime import datetime
+import pytz
+from streamlit.testing.v1 import AppTest
+import schema
+import storage
+
+
+
+# Páginas medidas, como no menu lateral
+PAGES = ("Home", "Inserir")
+
+
+
+
+
+## FUNÇÕES
+def _seed(path: str) -> None:
+    """Grava um turno de exemplo, para que a Home apresente um turno completo.
+
+    Args:
+        path (str): Arquivo do banco SQLite.
+    """
+    db = storage.SQLStorage(sqlite3.connect(path, check_same_thread=False))
+    now = datetime.now().astimezone(pytz.timezone("America/Sao_Paulo"))
+
+    records = {}
+    for area in schema.AREAS:
+        record = dict(schema.DEFAULTS[area], date=now, id="1234", endedshift="A")
+        for field in schema.fields_of_type(area, "float"):
+            record[field] = 2.5
+        for field in schema.fields_of_type(area, "str"):
+            if area == "obs":
+                record[field] = "Turno tranquilo, sem ocorrências"
+        records[area] = record
+
+    state_id = f"{now:%Y-%m-%d}_A"
+    db.commit_shift(storage.new_doc_id(now), records, state_id, dict(records, date=now, endedshift="A"))
+    db.connection.close()
+
+
+
+
+
+def _count(node) -> int:
+    """Quantidade de nós da árvore, incluindo o próprio nó."""
+    return 1 + sum(_count(child) for child in getattr(node, "children", {}).values())
+
+
+
+
+
+def count_deltas(app: str, page: str, secrets: dict) -> int:
+    """Executa uma página e conta os elementos e blocos enviados (área principal e menu lateral).
+
+    Args:
+        app (str): Caminho do app.py.
+        page (str): Página do menu lateral.
+        secrets (dict): Configuração 'storage' do app.
+
+    Returns:
+        int: Quantidade de mensagens delta.
+    """
+    at = AppTest.from_file(os.path.abspath(app), default_timeout=60)
+    at.secrets["storage"] = secrets
+    at.run()
+    if page != "Home":
+        at.sidebar.selectbox[0].select(page)
+        at.run()
+    if at.exception:
+        raise RuntimeError(f"{app} ({page}): {at.exception[0].message}")
+
+    # Os nós raiz (main e sidebar) não são mensagens
+    return _count(at.main) - 1 + _count(at.sidebar) - 1
+
+
+
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("apps", nargs="*", default=["app.py"], help="Arquivos app.py comparados.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'app':<40}" + "".join(f"{page:>10}" for page in PAGES))
+        for app in args.apps:
+            # Banco novo para cada versão, para que as medições não dependam da ordem
+            path = os.path.join(directory, f"{len(os.listdir(directory))}.db")
+            _seed(path)
+            secrets = {"backend": "sqlite", "path": path, "fulltext_path": os.path.join(directory, "obs.db")}
+
+            counts = [count_deltas(app, page, secrets) for page in PAGES]
+            print(f"{app:<40}" + "".join(f"{count:>10}" for count in counts))
+
+
+
+
+
+## EXECUÇÃO PRINCIPAL
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Micro-benchmark de __merge_docs em turnos sintéticos com muitos documentos.
+
+Compara a concatenação atual (um registro por documento, o último prevalece) com a original,
+que chamava to_dict() para cada campo de cada documento. Uso:
+
+    python bench_merge.py [--docs 150] [--repeat 20]
+
+app.py é importado fora do 'streamlit run', então os avisos de 'bare mode' do Streamlit são esperados.
+"""
+## IMPORTS
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+import pytz
+import schema
+import app
+
+
+
+# Valor sintético de cada tipo de campo
+SAMPLES = {
+    "str": lambda: random.choice(["", "Sem ocorrências", "Vazamento na bomba de soda"]),
+    "bool": lambda: random.random() < 0.5,
+    "float": lambda: round(random.uniform(0, 100), 1),
+    "int": lambda: schema.SCHEMA_VERSION,
+}
+
+
+
+
+
+## FUNÇÕES
+class _Snapshot:
+    """Documento no formato do stream do Firestore: to_dict() devolve uma cópia a cada chamada."""
+
+    def __init__(self, data: dict) -> None:
+        self._data = data
+
+
+    def to_dict(self) -> dict:
+        return dict(self._data)
+
+
+
+
+
+def _shift_docs(area: str, count: int) -> list:
+    """Registros sintéticos de uma área em um turno, em ordem crescente de data.
+
+    Args:
+        area (str): Identificador da área.
+        count (int): Quantidade de documentos.
+
+    Returns:
+        list: Registros (dict), como devolvidos pelo armazenamento.
+    """
+    start = pytz.timezone("America/Sao_Paulo").localize(datetime(2024, 5, 17, 7))
+    docs = []
+    for number in range(count):
+        record = {
+            field: SAMPLES[field_type]()
+            for field, field_type in schema.TYPES[area].items()
+            if field_type in SAMPLES
+        }
+        docs.append({**record, "date": start + timedelta(minutes=number), "id": "1234", "endedshift": "A"})
+
+    return docs
+
+
+
+
+
+def _baseline_merge(area: str, query) -> dict:
+    """Concatenação original (antes do user-007), sem a leitura do db_fields.json a cada chamada."""
+    merged = dict.fromkeys(schema.FIELDS[area])
+
+    for doc in query:
+        for key in merged.keys():
+            try:
+                if key == "date":
+                    if doc.to_dict()[key] == "":
+                        return None
+                    merged[key] = doc.to_dict()[key].astimezone(pytz.timezone("America/Sao_Paulo"))
+
+                elif (key == "endedshift") | (merged[key] == ""):
+                    merged[key] = doc.to_dict()[key]
+
+                else:
+                    merged[key] = doc.to_dict()[key]
+            except KeyError:
+                merged[key] = 0
+
+    return merged
+
+
+
+
+
+def _timeit(function, repeat: int) -> float:
+    """Tempo total (ms) de 'repeat' chamadas."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+
+    return (time.perf_counter() - start) * 1000
+
+
+
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=150, help="Documentos por área no turno.")
+    parser.add_argument("--repeat", type=int, default=20, help="Concatenações medidas por área.")
+    args = parser.parse_args()
+
+    merge_docs = getattr(app, "__merge_docs")
+    random.seed(0)
+
+    print(f"{'área':<6}{'original (ms)':>16}{'atual (ms)':>14}{'ganho':>10}")
+    for area in schema.AREAS:
+        docs = _shift_docs(area, args.docs)
+        snapshots = [_Snapshot(doc) for doc in docs]
+
+        # Mesmo resultado nas duas versões
+        assert _baseline_merge(area, snapshots) == merge_docs(area, docs, schema.FIELDS[area])
+
+        baseline = _timeit(lambda: _baseline_merge(area, snapshots), args.repeat)
+        current = _timeit(lambda: merge_docs(area, docs, schema.FIELDS[area]), args.repeat)
+        print(f"{area:<6}{baseline:>16.2f}{current:>14.2f}{baseline / current:>9.0f}x")
+
+
+
+
+
+## EXECUÇÃO PRINCIPAL
+if __name__ == "__main__":
+    main()
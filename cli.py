@@ -0,0 +1,333 @@
+"""Ferramentas de manutenção do Banco de Dados, executadas fora do Streamlit.
+
+Uso:
+    python cli.py rollups-backfill
+    python cli.py fulltext-rebuild
+    python cli.py export [--format parquet] [--start AAAA-MM-DD] [--end AAAA-MM-DD] [--watermark ARQUIVO]
+    python cli.py import ARQUIVO [--workers 4] [--dry-run]
+    python cli.py migrate [--checkpoint ARQUIVO]
+    python cli.py indexes
+    python cli.py check-indexes
+
+A configuração do banco é lida de .streamlit/secrets.toml, como na aplicação.
+"""
+## IMPORTS
+import argparse
+import json
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+import pandas as pd
+import pytz
+import streamlit as st
+import export
+import fulltext
+import importer
+import schema
+import storage
+
+
+
+
+
+## FUNÇÕES
+def load_shift_states(db: storage.Storage, fields: dict) -> pd.DataFrame:
+    """Reconstrói o estado de todos os turnos do histórico a partir das coleções de fechamento.
+    O registro mais recente de cada (dia, turno) prevalece, como na aplicação.
+
+    Args:
+        db (storage.Storage): Armazenamento.
+        fields (dict): Campos de cada área, indexados pelo identificador da área.
+
+    Returns:
+        pd.DataFrame: Uma linha por turno, com as colunas 'dia', 'endedshift' e os campos pedidos.
+    """
+    end = datetime.now(timezone.utc) + timedelta(days=1)
+    states = None
+
+    for area, area_fields in fields.items():
+        frame = pd.DataFrame(
+            list(db.query_range(area, storage.HISTORY_START, end, ("date", "endedshift", *area_fields))),
+            columns=["date", "endedshift", *area_fields],
+        )
+        frame["dia"] = pd.to_datetime(frame["date"], utc=True).dt.tz_convert("America/Sao_Paulo").dt.tz_localize(None).dt.normalize()
+        frame = frame.sort_values("date").drop_duplicates(["dia", "endedshift"], keep="last").drop(columns="date")
+
+        states = frame if states is None else states.merge(frame, on=["dia", "endedshift"], how="outer")
+
+    return states
+
+
+
+
+
+def rollups_backfill(db: storage.Storage) -> None:
+    """Reconstrói os rollups diários, semanais e mensais a partir de todo o histórico.
+
+    Args:
+        db (storage.Storage): Armazenamento.
+    """
+    metrics = list(storage.ROLLUP_METRICS)
+    fields = {}
+    for field, area in storage.ROLLUP_METRICS.items():
+        fields.setdefault(area, []).append(field)
+
+    states = load_shift_states(db, fields)
+    states[metrics] = states[metrics].apply(pd.to_numeric, errors="coerce").fillna(0.0).astype(float)
+    states["turnos"] = 1.0
+
+    # Mesmo formato de chave de storage.rollup_keys
+    iso = states["dia"].dt.isocalendar()
+    keys = {
+        "day": states["dia"].dt.strftime("%Y-%m-%d"),
+        "week": iso["year"].astype(str) + "-W" + iso["week"].astype(str).str.zfill(2),
+        "month": states["dia"].dt.strftime("%Y-%m"),
+    }
+
+    for period in storage.ROLLUP_PERIODS:
+        rollups = states.groupby(keys[period])[["turnos", *metrics]].sum()
+        db.replace_rollups(period, rollups.to_dict(orient="index"))
+        print(f"{period}: {len(rollups)} rollups a partir de {len(states)} turnos")
+
+
+
+
+
+def fulltext_rebuild(db: storage.Storage) -> None:
+    """Reconstrói o índice de busca das observações a partir de todo o histórico.
+
+    Args:
+        db (storage.Storage): Armazenamento.
+    """
+    index = fulltext.ObservationIndex(st.secrets.get("storage", {}).get("fulltext_path", "observacoes.db"))
+    end = datetime.now(timezone.utc) + timedelta(days=1)
+    fields = ("date", "endedshift", *schema.fields_of_type("obs", "str"))
+
+    shifts = index.rebuild(db.query_range("obs", storage.HISTORY_START, end, fields))
+    print(f"{shifts} turnos indexados")
+
+
+
+
+
+def export_shifts(db: storage.Storage, output: str, file_format: str = "csv", start: date = None, end: date = None,
+                  watermark: str = None) -> None:
+    """Exporta os fechamentos das quatro áreas, unidos pelo ID do documento, em CSV ou Parquet.
+    Com um arquivo de watermark, exporta apenas os fechamentos posteriores à última exportação
+    e atualiza o arquivo ao final.
+
+    Args:
+        db (storage.Storage): Armazenamento.
+        output (str): Arquivo de saída.
+        file_format (str, optional): 'csv' ou 'parquet'. Defaults to "csv".
+        start (date, optional): Primeiro dia exportado. Defaults to None (todo o histórico).
+        end (date, optional): Último dia exportado. Defaults to None (até o momento).
+        watermark (str, optional): Arquivo JSON com a data do último fechamento exportado. Defaults to None.
+    """
+    tz = pytz.timezone("America/Sao_Paulo")
+    start = tz.localize(datetime.combine(start, datetime.min.time())) if start else storage.HISTORY_START
+    end = tz.localize(datetime.combine(end + timedelta(days=1), datetime.min.time())) if end \
+        else datetime.now(timezone.utc) + timedelta(days=1)
+
+    if watermark and os.path.exists(watermark):
+        with open(watermark, mode="r", encoding="utf-8") as file:
+            last_exported = datetime.fromisoformat(json.load(file)["date"])
+        # O intervalo é inclusivo no início: o último fechamento exportado fica de fora
+        start = max(start, last_exported + timedelta(microseconds=1))
+
+    with open(output, mode="wb") as file:
+        count, last_date = export.WRITERS[file_format](export.iter_pages(db, start, end), file)
+    print(f"{output}: {count} fechamentos exportados")
+
+    if watermark and last_date is not None:
+        with open(watermark, mode="w", encoding="utf-8") as file:
+            json.dump({"date": last_date.isoformat()}, file)
+        print(f"{watermark}: {last_date.isoformat()}")
+
+
+
+
+
+def import_shifts(db: storage.Storage, path: str, workers: int = 4, dry_run: bool = False) -> bool:
+    """Importa fechamentos de um arquivo CSV ou JSONL (mesmas colunas da exportação), em lotes.
+    Nada é gravado se alguma linha for inválida.
+
+    Args:
+        db (storage.Storage): Armazenamento.
+        path (str): Arquivo de entrada.
+        workers (int, optional): Lotes gravados em paralelo. Defaults to 4.
+        dry_run (bool, optional): Apenas valida o arquivo. Defaults to False.
+
+    Returns:
+        bool: True se o arquivo for válido.
+    """
+    shifts, errors = importer.validate(importer.read_rows(path))
+    for error in errors[:20]:
+        print(error)
+    if errors:
+        print(f"{len(errors)} linhas inválidas; nenhum fechamento importado.")
+        return False
+
+    print(f"{path}: {len(shifts)} fechamentos válidos")
+    if dry_run or not shifts:
+        return True
+
+    started = time.perf_counter()
+    writes = importer.write_shifts(db, shifts, workers=workers)
+    elapsed = time.perf_counter() - started
+    print(f"{len(shifts)} fechamentos ({writes} documentos) gravados em {elapsed:.1f} s: "
+          f"{len(shifts) / elapsed:.0f} fechamentos/s, {writes / elapsed:.0f} documentos/s")
+
+    # A importação grava apenas as coleções de fechamento
+    print("Execute 'python cli.py rollups-backfill' e 'python cli.py fulltext-rebuild' para atualizar rollups e busca.")
+    return True
+
+
+
+
+
+def migrate(db: storage.Storage, checkpoint: str = "migracao.json", page_size: int = storage.Storage.MAX_BATCH_WRITES) -> None:
+    """Completa os documentos anteriores à versão atual do schema com o valor padrão de cada campo ausente
+    e grava a versão em cada documento, percorrendo as coleções em lotes.
+    O progresso é salvo após cada lote: se interrompida, a migração continua de onde parou.
+
+    Args:
+        db (storage.Storage): Armazenamento.
+        checkpoint (str, optional): Arquivo de progresso. Defaults to "migracao.json".
+        page_size (int, optional): Documentos por lote. Defaults to storage.Storage.MAX_BATCH_WRITES.
+    """
+    progress = {}
+    if os.path.exists(checkpoint):
+        with open(checkpoint, mode="r", encoding="utf-8") as file:
+            progress = json.load(file)
+    # Progresso de outra versão do schema não vale para esta
+    if progress.get("schema_version") != schema.SCHEMA_VERSION:
+        progress = {"schema_version": schema.SCHEMA_VERSION, "areas": {}}
+
+    for area in schema.AREAS:
+        state = progress["areas"].setdefault(area, {"after": None, "done": False, "scanned": 0, "migrated": 0})
+
+        while not state["done"]:
+            docs = db.scan_page(area, page_size, state["after"])
+            writes = [
+                (area, doc_id, {**schema.DEFAULTS[area], **record, "schema_version": schema.SCHEMA_VERSION})
+                for doc_id, record in docs
+                if record.get("schema_version") != schema.SCHEMA_VERSION
+            ]
+            if writes:
+                db.write_batch(writes)
+
+            state["scanned"] += len(docs)
+            state["migrated"] += len(writes)
+            state["after"] = docs[-1][0] if docs else state["after"]
+            state["done"] = len(docs) < page_size
+
+            with open(checkpoint, mode="w", encoding="utf-8") as file:
+                json.dump(progress, file, indent=2)
+
+        print(f"{area}: {state['migrated']} de {state['scanned']} documentos migrados")
+
+
+
+
+
+def write_indexes(path: str = "firestore.indexes.json") -> None:
+    """Gera o firestore.indexes.json com os índices compostos exigidos pelas consultas da aplicação.
+    Publicado com 'firebase deploy --only firestore:indexes'.
+
+    Args:
+        path (str, optional): Arquivo de saída. Defaults to "firestore.indexes.json".
+    """
+    with open(path, mode="w", encoding="utf-8") as file:
+        json.dump(storage.firestore_indexes(), file, indent=2)
+        file.write("\n")
+
+    print(f"{path}: {len(storage.firestore_indexes()['indexes'])} índices compostos")
+
+
+
+
+
+def check_indexes(db: storage.Storage) -> bool:
+    """Executa cada formato de consulta da aplicação no Firestore configurado e relata os índices ausentes.
+
+    Args:
+        db (storage.Storage): Armazenamento (apenas Firestore).
+
+    Returns:
+        bool: True se todas as consultas forem atendidas.
+    """
+    if not isinstance(db, storage.FirestoreStorage):
+        print("Verificação de índices disponível apenas para o Firestore.")
+        return True
+
+    if os.environ.get("FIRESTORE_EMULATOR_HOST"):
+        print("Atenção: o emulador não exige índices compostos; verifique também no projeto de produção.")
+
+    results = db.check_indexes()
+    for description, error in results.items():
+        print(f"[{'OK' if error is None else 'SEM ÍNDICE'}] {description}")
+        if error is not None:
+            print(f"    {error}")
+
+    return all(error is None for error in results.values())
+
+
+
+
+
+def main() -> None:
+    """Interpreta os argumentos da linha de comando e executa a ferramenta escolhida.
+    """
+    parser = argparse.ArgumentParser(description="Ferramentas de manutenção do Book de Turno.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("rollups-backfill", help="Reconstrói os rollups a partir do histórico.")
+    commands.add_parser("fulltext-rebuild", help="Reconstrói o índice de busca das observações.")
+    export_parser = commands.add_parser("export", help="Exporta os fechamentos em CSV ou Parquet.")
+    export_parser.add_argument("--format", choices=list(export.WRITERS), default="csv", help="Formato do arquivo.")
+    export_parser.add_argument("--output", help="Arquivo de saída. Padrão: fechamentos.<formato>.")
+    export_parser.add_argument("--start", type=date.fromisoformat, help="Primeiro dia (AAAA-MM-DD).")
+    export_parser.add_argument("--end", type=date.fromisoformat, help="Último dia (AAAA-MM-DD).")
+    export_parser.add_argument("--watermark", help="Arquivo com a data do último fechamento exportado (exportação incremental).")
+    import_parser = commands.add_parser("import", help="Importa fechamentos de um arquivo CSV ou JSONL.")
+    import_parser.add_argument("path", help="Arquivo de entrada (.csv ou .jsonl).")
+    import_parser.add_argument("--workers", type=int, default=4, help="Lotes gravados em paralelo.")
+    import_parser.add_argument("--dry-run", action="store_true", help="Apenas valida o arquivo.")
+    migrate_parser = commands.add_parser("migrate", help="Completa os documentos antigos com os campos da versão atual do schema.")
+    migrate_parser.add_argument("--checkpoint", default="migracao.json", help="Arquivo de progresso da migração.")
+    commands.add_parser("indexes", help="Gera o firestore.indexes.json a partir do schema.")
+    commands.add_parser("check-indexes", help="Verifica se as consultas da aplicação têm os índices necessários.")
+    args = parser.parse_args()
+
+    # Gerar o arquivo de índices não exige conexão com o banco
+    if args.command == "indexes":
+        write_indexes()
+        return None
+
+    db = storage.connect(st.secrets)
+    started = time.perf_counter()
+
+    if args.command == "rollups-backfill":
+        rollups_backfill(db)
+    elif args.command == "fulltext-rebuild":
+        fulltext_rebuild(db)
+    elif args.command == "export":
+        export_shifts(db, args.output or f"fechamentos.{args.format}", args.format, args.start, args.end, args.watermark)
+    elif args.command == "import":
+        if not import_shifts(db, args.path, args.workers, args.dry_run):
+            raise SystemExit(1)
+    elif args.command == "migrate":
+        migrate(db, args.checkpoint)
+    elif args.command == "check-indexes":
+        if not check_indexes(db):
+            raise SystemExit(1)
+
+    print(f"Concluído em {time.perf_counter() - started:.1f} s")
+
+
+
+
+
+## EXECUÇÃO PRINCIPAL
+if __name__ == "__main__":
+    main()
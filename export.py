@@ -0,0 +1,147 @@
+## IMPORTS
+import csv
+import io
+from datetime import datetime
+from typing import BinaryIO, Iterator
+import pytz
+import schema
+import storage
+
+
+
+# Fechamentos lidos por página na exportação
+EXPORT_PAGE_SIZE = 500
+
+# Colunas do arquivo exportado: ID do documento, campos de controle e os campos de cada área, sem prefixo
+# (os nomes dos campos não se repetem entre as áreas)
+COLUMNS = ("doc_id", *schema.META_FIELDS, *(
+    field for area in schema.AREAS for field in schema.FIELDS[area] if field not in schema.META_FIELDS
+))
+
+# Tipo de cada coluna, como no schema
+COLUMN_TYPES = {
+    "doc_id": "str",
+    **{field: field_type for area in schema.AREAS for field, field_type in schema.TYPES[area].items()},
+}
+
+
+
+
+
+## FUNÇÕES
+def _flatten(shift: dict) -> dict:
+    """Une os registros das áreas de um fechamento em uma linha.
+
+    Args:
+        shift (dict): Fechamento, com 'doc_id' e o registro de cada área encontrada.
+
+    Returns:
+        dict: Valor de cada coluna (None para áreas ou campos ausentes).
+    """
+    row = dict.fromkeys(COLUMNS)
+    row["doc_id"] = shift["doc_id"]
+
+    for area in schema.AREAS:
+        for field, value in shift.get(area, {}).items():
+            # Campos de controle vêm da primeira área em que aparecem (ETA)
+            if field in row and row[field] is None:
+                row[field] = value
+
+    if row["date"] is not None:
+        row["date"] = row["date"].astimezone(pytz.timezone("America/Sao_Paulo"))
+
+    return row
+
+
+
+
+
+def iter_pages(db: storage.Storage, start: datetime, end: datetime, page_size: int = EXPORT_PAGE_SIZE) -> Iterator[list]:
+    """Percorre os fechamentos de um intervalo página a página, sem carregar o intervalo inteiro na memória.
+
+    Args:
+        db (storage.Storage): Armazenamento.
+        start (datetime): Início do intervalo (inclusivo).
+        end (datetime): Fim do intervalo (exclusivo).
+        page_size (int, optional): Fechamentos por página. Defaults to EXPORT_PAGE_SIZE.
+
+    Yields:
+        list: Linhas da página, em ordem crescente de data.
+    """
+    cursor = None
+    while True:
+        shifts, cursor = db.export_page(start, end, page_size, cursor)
+        if shifts:
+            yield [_flatten(shift) for shift in shifts]
+        if cursor is None:
+            break
+
+
+
+
+
+def write_csv(pages: Iterator[list], file: BinaryIO) -> tuple:
+    """Grava as páginas em CSV (UTF-8), uma página por vez.
+
+    Args:
+        pages (Iterator[list]): Páginas de linhas, como devolvidas por iter_pages.
+        file (BinaryIO): Arquivo de saída, aberto em modo binário.
+
+    Returns:
+        tuple: Quantidade de linhas gravadas e a data da última linha (None se nenhuma).
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+    writer = csv.DictWriter(text, fieldnames=COLUMNS)
+    writer.writeheader()
+
+    count, last_date = 0, None
+    for rows in pages:
+        writer.writerows({**row, "date": row["date"].isoformat() if row["date"] else None} for row in rows)
+        text.flush()
+        count, last_date = count + len(rows), rows[-1]["date"]
+
+    # O arquivo continua aberto para quem o passou
+    text.detach()
+
+    return count, last_date
+
+
+
+
+
+def write_parquet(pages: Iterator[list], file: BinaryIO) -> tuple:
+    """Grava as páginas em Parquet (requer PyArrow), um row group por página.
+
+    Args:
+        pages (Iterator[list]): Páginas de linhas, como devolvidas por iter_pages.
+        file (BinaryIO): Arquivo de saída, aberto em modo binário.
+
+    Returns:
+        tuple: Quantidade de linhas gravadas e a data da última linha (None se nenhuma).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    types = {
+        "timestamp": pa.timestamp("us", tz="America/Sao_Paulo"),
+        "str": pa.string(),
+        "bool": pa.bool_(),
+        "float": pa.float64(),
+        "int": pa.int64(),
+    }
+    arrow_schema = pa.schema([(column, types[COLUMN_TYPES[column]]) for column in COLUMNS])
+
+    count, last_date = 0, None
+    with pq.ParquetWriter(file, arrow_schema) as writer:
+        for rows in pages:
+            writer.write_table(pa.Table.from_pylist(rows, schema=arrow_schema))
+            count, last_date = count + len(rows), rows[-1]["date"]
+
+    return count, last_date
+
+
+
+
+
+# Gravação de cada formato de exportação
+WRITERS = {"csv": write_csv, "parquet": write_parquet}
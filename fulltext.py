@@ -0,0 +1,129 @@
+## IMPORTS
+import re
+import sqlite3
+import threading
+from typing import Iterable
+import pytz
+import schema
+
+
+
+
+
+## ÍNDICE INVERTIDO
+class ObservationIndex:
+    """Índice invertido das observações dos turnos, persistido localmente em SQLite FTS5.
+    A busca ignora maiúsculas e acentos e cada turno é indexado com o seu estado mais recente,
+    o mesmo apresentado na Home e na Busca.
+    """
+
+    def __init__(self, path: str = "observacoes.db") -> None:
+        """
+        Args:
+            path (str, optional): Arquivo do índice. Defaults to "observacoes.db".
+        """
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self.connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS obs_fts USING fts5("
+                "state_id UNINDEXED, day UNINDEXED, endedshift UNINDEXED, field UNINDEXED, text, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            )
+            self.connection.commit()
+
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.connection.execute("SELECT count(*) FROM obs_fts").fetchone()[0]
+
+
+    @staticmethod
+    def _rows(state_id: str, record: dict) -> list:
+        """Linhas do índice para as observações de um turno: uma por campo preenchido.
+
+        Args:
+            state_id (str): ID do estado do turno no formato 'AAAA-MM-DD_<turno>'.
+            record (dict): Registro da área 'obs'.
+
+        Returns:
+            list: Tuplas (state_id, day, endedshift, field, text).
+        """
+        day, shift = state_id.split("_", 1)
+
+        return [
+            (state_id, day, shift, field, record[field])
+            for field in schema.fields_of_type("obs", "str")
+            if record.get(field)
+        ]
+
+
+    def update(self, state_id: str, record: dict) -> None:
+        """Substitui as observações indexadas de um turno pelas do registro inserido.
+
+        Args:
+            state_id (str): ID do estado do turno no formato 'AAAA-MM-DD_<turno>'.
+            record (dict): Registro da área 'obs'.
+        """
+        with self._lock:
+            self.connection.execute("DELETE FROM obs_fts WHERE state_id = ?", (state_id,))
+            self.connection.executemany("INSERT INTO obs_fts VALUES (?, ?, ?, ?, ?)", self._rows(state_id, record))
+            self.connection.commit()
+
+
+    def rebuild(self, records: Iterable[dict]) -> int:
+        """Reconstrói todo o índice a partir do histórico da coleção de observações.
+
+        Args:
+            records (Iterable[dict]): Registros da área 'obs' em ordem crescente de data.
+
+        Returns:
+            int: Quantidade de turnos indexados.
+        """
+        latest = {}
+        for record in records:
+            day = record["date"].astimezone(pytz.timezone("America/Sao_Paulo")).strftime("%Y-%m-%d")
+            latest[f"{day}_{record['endedshift']}"] = record
+
+        with self._lock:
+            self.connection.execute("DELETE FROM obs_fts")
+            self.connection.executemany(
+                "INSERT INTO obs_fts VALUES (?, ?, ?, ?, ?)",
+                [row for state_id, record in latest.items() for row in self._rows(state_id, record)],
+            )
+            self.connection.commit()
+
+        return len(latest)
+
+
+    def search(self, text: str, limit: int = 50) -> list:
+        """Busca por palavras-chave, todas obrigatórias e aceitas como prefixo ('bomba' encontra 'bombas').
+
+        Args:
+            text (str): Palavras buscadas.
+            limit (int, optional): Quantidade máxima de turnos. Defaults to 50.
+
+        Returns:
+            list: Um dict por turno ('day', 'endedshift', 'field', 'snippet'), do mais relevante ao menos relevante.
+        """
+        words = re.findall(r"\w+", text)
+        if not words:
+            return []
+
+        match = " ".join(f'"{word}"*' for word in words)
+
+        # Campos em ordem de relevância (bm25): o primeiro campo de cada turno representa o turno
+        hits = {}
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT state_id, day, endedshift, field, snippet(obs_fts, 4, '**', '**', '…', 16) "
+                "FROM obs_fts WHERE obs_fts MATCH ? ORDER BY rank",
+                (match,),
+            )
+            for state_id, day, shift, field, snippet in rows:
+                hits.setdefault(state_id, {"day": day, "endedshift": shift, "field": field, "snippet": snippet})
+                if len(hits) == limit:
+                    break
+
+        return list(hits.values())
@@ -0,0 +1,231 @@
+## IMPORTS
+import csv
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterator
+import pytz
+import export
+import schema
+import storage
+
+
+
+# Valores aceitos nos campos booleanos (sem diferenciar maiúsculas)
+TRUE_VALUES = ("true", "1", "sim", "s", "yes")
+FALSE_VALUES = ("false", "0", "não", "nao", "n", "no")
+
+# Turnos válidos
+SHIFTS = ("A", "B", "C")
+
+# Áreas que os históricos antigos podem não ter: gravadas apenas quando algum campo está preenchido.
+# As demais são sempre gravadas, pois as buscas, a Home e a exportação partem do registro da ETA
+OPTIONAL_AREAS = ("quim",)
+
+
+
+
+
+## FUNÇÕES
+def read_rows(path: str) -> Iterator[tuple]:
+    """Lê as linhas de um arquivo CSV ou JSONL (um objeto JSON por linha), com as colunas da exportação.
+
+    Args:
+        path (str): Arquivo de entrada; '.jsonl' é lido como JSONL e os demais como CSV.
+
+    Yields:
+        tuple: Número da linha no arquivo e a linha (dict; no JSONL, o valor lido ou o texto de uma linha inválida).
+    """
+    with open(path, mode="r", encoding="utf-8", newline="") as file:
+        if path.endswith(".jsonl"):
+            for number, line in enumerate(file, start=1):
+                if line.strip():
+                    try:
+                        yield number, json.loads(line)
+                    except json.JSONDecodeError:
+                        # Rejeitada na validação, com o número da linha
+                        yield number, line.strip()
+        else:
+            # Cabeçalho na linha 1
+            for number, row in enumerate(csv.DictReader(file), start=2):
+                yield number, row
+
+
+
+
+
+def _parse_value(field_type: str, value):
+    """Converte um valor lido do arquivo para o tipo do campo no schema.
+
+    Args:
+        field_type (str): 'timestamp', 'str', 'bool', 'float' ou 'int'.
+        value: Valor lido (texto no CSV; texto, número ou booleano no JSONL).
+
+    Raises:
+        ValueError: Valor incompatível com o tipo.
+        TypeError: Valor de tipo incompatível lido do JSONL (ex.: número em um campo de data).
+
+    Returns:
+        Valor convertido, ou None para valores vazios.
+    """
+    if value is None or value == "":
+        return None
+
+    if field_type == "timestamp":
+        parsed = datetime.fromisoformat(value)
+        # Datas sem fuso são do horário local da planta
+        return pytz.timezone("America/Sao_Paulo").localize(parsed) if parsed.tzinfo is None else parsed
+    if field_type == "bool":
+        if isinstance(value, bool):
+            return value
+        if str(value).strip().lower() in TRUE_VALUES:
+            return True
+        if str(value).strip().lower() in FALSE_VALUES:
+            return False
+        raise ValueError(f"'{value}' não é booleano")
+    if field_type == "float":
+        return float(str(value).replace(",", "."))
+    if field_type == "int":
+        return int(value)
+
+    return str(value)
+
+
+
+
+
+def validate(rows: Iterator[tuple]) -> tuple:
+    """Valida as linhas contra o db_fields.json e as converte em fechamentos.
+    Os campos vazios são completados pelo valor padrão, na versão atual do schema. As áreas opcionais
+    (históricos antigos não têm a área de químicos) são gravadas apenas se a linha tiver ao menos
+    um de seus campos preenchido.
+
+    Args:
+        rows (Iterator[tuple]): Número da linha e linha, como devolvidos por read_rows.
+
+    Returns:
+        tuple: Fechamentos válidos (list de dicts com 'doc_id' e o registro de cada área) e erros (list de str).
+    """
+    shifts, errors, doc_ids = [], [], set()
+
+    for number, row in rows:
+        if not isinstance(row, dict):
+            errors.append(f"linha {number}: a linha não é um objeto JSON")
+            continue
+
+        unknown = [column for column in row if column not in export.COLUMN_TYPES]
+        if unknown:
+            errors.append(f"linha {number}: colunas desconhecidas {unknown}")
+            continue
+
+        try:
+            values = {column: _parse_value(export.COLUMN_TYPES[column], value) for column, value in row.items()}
+        except (TypeError, ValueError) as e:
+            errors.append(f"linha {number}: {e}")
+            continue
+
+        if values.get("date") is None:
+            errors.append(f"linha {number}: 'date' é obrigatório")
+            continue
+        if values.get("endedshift") not in SHIFTS:
+            errors.append(f"linha {number}: 'endedshift' deve ser um de {SHIFTS}")
+            continue
+
+        doc_id = values.get("doc_id") or storage.new_doc_id(values["date"])
+        if doc_id in doc_ids:
+            errors.append(f"linha {number}: 'doc_id' {doc_id} repetido")
+            continue
+        doc_ids.add(doc_id)
+
+        shift = {"doc_id": doc_id}
+        for area in schema.AREAS:
+            fields = [field for field in schema.FIELDS[area] if field not in schema.META_FIELDS]
+            if area in OPTIONAL_AREAS and not any(values.get(field) is not None for field in fields):
+                continue
+            shift[area] = {
+                **schema.DEFAULTS[area],
+                **{field: values[field] for field in schema.FIELDS[area] if values.get(field) is not None},
+                "schema_version": schema.SCHEMA_VERSION,
+            }
+        shifts.append(shift)
+
+    return shifts, errors
+
+
+
+
+
+def _batches(shifts: list, max_writes: int) -> Iterator[list]:
+    """Agrupa as gravações dos fechamentos em lotes de até max_writes operações,
+    sem dividir um fechamento entre dois lotes.
+
+    Args:
+        shifts (list): Fechamentos validados.
+        max_writes (int): Máximo de operações por lote.
+
+    Yields:
+        list: Tuplas (área, ID do documento, registro).
+    """
+    batch = []
+    for shift in shifts:
+        writes = [(area, shift["doc_id"], shift[area]) for area in schema.AREAS if area in shift]
+        if len(batch) + len(writes) > max_writes:
+            yield batch
+            batch = []
+        batch += writes
+
+    if batch:
+        yield batch
+
+
+
+
+
+def _write_with_retry(db: storage.Storage, writes: list, retries: int) -> int:
+    """Grava um lote, tentando novamente com espera exponencial (e aleatória) em caso de falha.
+
+    Args:
+        db (storage.Storage): Armazenamento.
+        writes (list): Tuplas (área, ID do documento, registro).
+        retries (int): Novas tentativas antes de desistir.
+
+    Raises:
+        Exception: Erro da última tentativa.
+
+    Returns:
+        int: Quantidade de operações gravadas.
+    """
+    for attempt in range(retries + 1):
+        try:
+            db.write_batch(writes)
+            return len(writes)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(min(30.0, 0.5 * 2**attempt) * random.uniform(0.5, 1.5))
+
+
+
+
+
+def write_shifts(db: storage.Storage, shifts: list, workers: int = 4, retries: int = 5) -> int:
+    """Grava os fechamentos em lotes, com no máximo 'workers' lotes em andamento ao mesmo tempo.
+    Como os IDs dos documentos são fixos, importar o mesmo arquivo novamente não duplica registros.
+
+    Args:
+        db (storage.Storage): Armazenamento.
+        shifts (list): Fechamentos validados.
+        workers (int, optional): Lotes gravados em paralelo. Defaults to 4.
+        retries (int, optional): Novas tentativas de cada lote. Defaults to 5.
+
+    Returns:
+        int: Quantidade de operações gravadas.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_write_with_retry, db, writes, retries)
+            for writes in _batches(shifts, db.MAX_BATCH_WRITES)
+        ]
+        return sum(future.result() for future in futures)
@@ -0,0 +1,63 @@
+## IMPORTS
+import streamlit as st
+
+
+
+# Espaçamento vertical (rem) antes de cada tipo de seção
+SPACING = {"secao": 3.0, "acao": 2.0}
+
+# Estilos da aplicação, enviados uma única vez por página: espaçamento das seções (pela classe
+# 'st-key-<chave>' que o Streamlit atribui aos containers com key), rótulos de grupo e itens do turno,
+# com as cores dos alertas do Streamlit (success, error e info)
+CSS = "\n".join([
+    "<style>",
+    *(f'[class*="st-key-{kind}_"]{{margin-top:{rem}rem}}' for kind, rem in SPACING.items()),
+    ".rotulo{font-family:Roboto:wght@100;letter-spacing:.7px;font-size:20px}",
+    ".item{padding:1rem;border-radius:.5rem;margin:1rem 0}",
+    ".good{background-color:rgba(33,195,84,.1);color:rgb(23,114,51)}",
+    ".bad{background-color:rgba(255,43,43,.09);color:rgb(125,53,59)}",
+    ".info{background-color:rgba(28,131,225,.1);color:rgb(0,66,128)}",
+    "</style>",
+])
+
+
+
+
+
+## FUNÇÕES
+def apply_styles() -> None:
+    """Envia os estilos da aplicação para a página. Deve ser chamada uma vez, no início de cada execução.
+    """
+    st.html(CSS)
+
+
+
+
+
+def section(name: str, kind: str = "secao"):
+    """Container de uma seção da página, afastado do conteúdo anterior por CSS
+    (em vez de elementos vazios para criar o espaço).
+
+    Args:
+        name (str): Nome da seção, único na página.
+        kind (str, optional): Tipo de seção em SPACING. Defaults to "secao".
+
+    Returns:
+        DeltaGenerator: Container da seção, para uso com 'with'.
+    """
+    return st.container(key=f"{kind}_{name}")
+
+
+
+
+
+def label(text: str) -> str:
+    """Rótulo de um grupo de campos em HTML.
+
+    Args:
+        text (str): Texto do rótulo.
+
+    Returns:
+        str: Parágrafo HTML com a classe 'rotulo'.
+    """
+    return f'<p class="rotulo">{text}</p>'
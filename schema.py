@@ -0,0 +1,102 @@
+## IMPORTS
+import hashlib
+import json
+from pathlib import Path
+
+
+
+## REGISTRO DO SCHEMA
+# db_fields.json é lido uma única vez, na importação do módulo
+with open(Path(__file__).with_name("db_fields.json"), mode="r", encoding="utf-8") as file:
+    _fields_json = json.load(file)
+
+
+# Identificadores das áreas, na ordem do arquivo ('eta', 'etei', 'obs', 'quim')
+AREAS = tuple(_fields_json)
+
+# Campos de controle presentes em todas as áreas
+META_FIELDS = ("date", "id", "endedshift", "schema_version")
+
+# Versão do schema gravada em cada documento, derivada dos campos e tipos do db_fields.json
+# (31 bits, para caber em INTEGER no MySQL): muda sozinha quando um campo é adicionado.
+# Documentos na versão atual têm todos os campos do schema; os anteriores são completados
+# com o valor padrão na leitura e, no banco, com 'python cli.py migrate'
+SCHEMA_VERSION = int.from_bytes(hashlib.sha256(json.dumps(
+    {area: {field: spec["type"] for field, spec in specs.items()} for area, specs in _fields_json.items()},
+    sort_keys=True,
+).encode()).digest()[:4], "big") & 0x7FFFFFFF
+
+# Campos de cada área, na ordem do arquivo
+FIELDS = {area: tuple(specs) for area, specs in _fields_json.items()}
+
+# Tipo de cada campo ('timestamp', 'str', 'bool', 'float' ou 'int')
+TYPES = {area: {field: spec["type"] for field, spec in specs.items()} for area, specs in _fields_json.items()}
+
+# Valor padrão de cada tipo, para campos ausentes em documentos anteriores à versão atual
+TYPE_DEFAULTS = {"str": "", "bool": False, "float": 0.0, "int": 0}
+
+# Valor padrão de cada campo (exceto data e turno, sempre presentes), na versão atual do schema
+DEFAULTS = {
+    area: {
+        field: SCHEMA_VERSION if field == "schema_version" else TYPE_DEFAULTS[field_type]
+        for field, field_type in TYPES[area].items()
+        if field not in ("date", "endedshift")
+    }
+    for area in AREAS
+}
+
+# Metadados de apresentação de cada campo: label, unit e, nos itens da Home,
+# polarity ('positive' se 'Sim' é o estado bom, 'negative' se é o ruim) e threshold (valor mínimo aceitável);
+# no formulário, form_label (quando difere de label) e required (valor obrigatório)
+DISPLAY = {
+    area: {
+        field: {key: value for key, value in spec.items() if key not in ("type", "views")}
+        for field, spec in specs.items()
+    }
+    for area, specs in _fields_json.items()
+}
+
+# Telas em que cada campo é usado; campos sem "views" no arquivo entram em todas
+_VIEWS = {
+    area: {field: spec.get("views") for field, spec in specs.items()}
+    for area, specs in _fields_json.items()
+}
+
+
+
+
+
+## FUNÇÕES
+def fields_of_type(area: str, field_type: str) -> tuple:
+    """Campos de uma área com o tipo informado, excluindo os campos de controle.
+
+    Args:
+        area (str): Identificador da área ('eta', 'etei', 'obs' ou 'quim').
+        field_type (str): Tipo dos campos ('str', 'bool' ou 'float').
+
+    Returns:
+        tuple: Nomes dos campos.
+    """
+    return tuple(
+        field for field in FIELDS[area]
+        if field not in META_FIELDS and TYPES[area][field] == field_type
+    )
+
+
+
+
+
+def projection(area: str, view: str) -> tuple:
+    """Campos de uma área necessários para uma tela, usados como projeção (select) nas buscas.
+
+    Args:
+        area (str): Identificador da área ('eta', 'etei', 'obs' ou 'quim').
+        view (str): Identificador da tela (ex.: 'display', para a Home e a Busca).
+
+    Returns:
+        tuple: Nomes dos campos.
+    """
+    return tuple(
+        field for field in FIELDS[area]
+        if _VIEWS[area][field] is None or view in _VIEWS[area][field]
+    )
@@ -0,0 +1,972 @@
+## IMPORTS
+from abc import ABC, abstractmethod
+from google.api_core.exceptions import FailedPrecondition
+from google.cloud import firestore
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable
+import schema
+
+
+
+
+
+# Início de todo o histórico, para as consultas que percorrem todos os registros
+HISTORY_START = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+
+# Alfabeto Base32 de Crockford usado nos IDs dos documentos (ordenável lexicograficamente)
+ID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+
+
+
+## IDS
+def new_doc_id(when: datetime) -> str:
+    """Gera um ID único e ordenável no tempo para os documentos do turno, no formato ULID:
+    48 bits com o timestamp em milissegundos seguidos de 80 bits aleatórios, codificados em Base32 (26 caracteres).
+
+    Args:
+        when (datetime): Momento do fechamento.
+
+    Returns:
+        str: ID do documento.
+    """
+    timestamp = int(when.timestamp() * 1000) & (2**48 - 1)
+    value = (timestamp << 80) | int.from_bytes(os.urandom(10), "big")
+
+    return "".join(ID_ALPHABET[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+
+
+
+
+## ROLLUPS
+# Períodos dos rollups: cada turno é somado no seu dia, semana ISO e mês
+ROLLUP_PERIODS = ("day", "week", "month")
+
+# Métricas dos rollups: volume de cada químico (soma) e quantidade de turnos com 'Sim' em cada evento
+ROLLUP_METRICS = {
+    **{field: "quim" for field in schema.fields_of_type("quim", "float")},
+    **{field: area for area in ("eta", "etei") for field in schema.fields_of_type(area, "bool")},
+}
+
+
+
+
+
+def rollup_keys(state_id: str) -> dict:
+    """Chaves dos períodos em que um turno é agregado.
+
+    Args:
+        state_id (str): ID do estado do turno no formato 'AAAA-MM-DD_<turno>'.
+
+    Returns:
+        dict: Chave de cada período ('AAAA-MM-DD', 'AAAA-Www' e 'AAAA-MM'), indexada pelo período.
+    """
+    day = date.fromisoformat(state_id[:10])
+    year, week, _ = day.isocalendar()
+
+    return {"day": day.isoformat(), "week": f"{year}-W{week:02d}", "month": day.strftime("%Y-%m")}
+
+
+
+
+
+def rollup_delta(previous: dict, state: dict) -> dict:
+    """Variação das métricas dos rollups quando o estado de um turno é substituído.
+    Como o registro mais recente prevalece, soma-se o novo estado e subtrai-se o anterior.
+
+    Args:
+        previous (dict): Estado anterior do turno. None caso seja o primeiro registro do turno.
+        state (dict): Novo estado do turno.
+
+    Returns:
+        dict: Variação de cada métrica, incluindo 'turnos' (quantidade de turnos agregados).
+    """
+    def value(shift_state: dict, area: str, field: str) -> float:
+        if shift_state is None:
+            return 0.0
+        try:
+            return float(shift_state.get(area, {}).get(field) or 0)
+        except (TypeError, ValueError):
+            return 0.0
+
+    delta = {"turnos": 0.0 if previous else 1.0}
+    for field, area in ROLLUP_METRICS.items():
+        delta[field] = value(state, area, field) - value(previous, area, field)
+
+    return delta
+
+
+
+
+
+## INTERFACE
+class Storage(ABC):
+    """Interface de armazenamento dos fechamentos de turno.
+    Todas as datas recebidas sem fuso horário são tratadas como UTC, como faz o Firestore.
+    """
+
+    # Máximo de operações em um único lote de write_batch (limite do Firestore)
+    MAX_BATCH_WRITES = 500
+
+    @abstractmethod
+    def ping(self) -> None:
+        """Verifica se o banco está acessível.
+
+        Raises:
+            Exception: Erro do driver caso o banco não responda.
+        """
+
+
+    def watch_latest_shift(self, callback):
+        """Assina o estado materializado do turno mais recente: a cada mudança, apenas o documento
+        alterado é entregue ao callback, em uma thread do driver.
+
+        Args:
+            callback (Callable[[str, dict], None]): Recebe o ID do estado e o estado do turno.
+
+        Returns:
+            Assinatura, com o método unsubscribe() e a propriedade is_active (False se o stream terminou),
+            ou None caso o banco não ofereça atualizações em tempo real.
+        """
+        return None
+
+
+    @abstractmethod
+    def latest_shift(self) -> tuple:
+        """Último turno inserido no banco.
+
+        Raises:
+            IndexError: Caso não haja nenhum registro.
+
+        Returns:
+            tuple: Data (datetime com fuso) e turno (str) do último registro.
+        """
+
+
+    @abstractmethod
+    def query_area(self, area: str, start: datetime, end: datetime, shift: str, fields: tuple) -> Iterable[dict]:
+        """Registros de uma área em um intervalo de datas e turno, em ordem crescente de data.
+
+        Args:
+            area (str): Identificador da área ('eta', 'etei', 'obs' ou 'quim').
+            start (datetime): Início do intervalo (exclusivo).
+            end (datetime): Fim do intervalo (exclusivo).
+            shift (str): Turno.
+            fields (tuple): Campos retornados (projeção).
+
+        Returns:
+            Iterable[dict]: Registros da área.
+        """
+
+
+    @abstractmethod
+    def query_range(self, area: str, start: datetime, end: datetime, fields: tuple) -> Iterable[dict]:
+        """Registros de uma área em um intervalo de datas, de todos os turnos, em ordem crescente de data.
+
+        Args:
+            area (str): Identificador da área ('eta', 'etei', 'obs' ou 'quim').
+            start (datetime): Início do intervalo (inclusivo).
+            end (datetime): Fim do intervalo (exclusivo).
+            fields (tuple): Campos retornados (projeção).
+
+        Returns:
+            Iterable[dict]: Registros da área.
+        """
+
+
+    @abstractmethod
+    def query_page(self, area: str, start: datetime, end: datetime, shifts: list, fields: tuple,
+                   page_size: int, cursor=None) -> tuple:
+        """Uma página dos registros de uma área em um intervalo de datas, em ordem crescente de data.
+
+        Args:
+            area (str): Identificador da área ('eta', 'etei', 'obs' ou 'quim').
+            start (datetime): Início do intervalo (inclusivo).
+            end (datetime): Fim do intervalo (exclusivo).
+            shifts (list): Turnos buscados. Vazio para todos.
+            fields (tuple): Campos retornados (projeção).
+            page_size (int): Quantidade máxima de registros da página.
+            cursor (optional): Cursor devolvido pela página anterior. Defaults to None (primeira página).
+
+        Returns:
+            tuple: Registros da página (list) e o cursor da próxima página (None na última página).
+        """
+
+
+    @abstractmethod
+    def export_page(self, start: datetime, end: datetime, page_size: int, cursor=None) -> tuple:
+        """Uma página de fechamentos completos em um intervalo de datas, em ordem crescente de data.
+        A coleção de ETA conduz a paginação e as demais áreas são unidas pelo ID do documento.
+
+        Args:
+            start (datetime): Início do intervalo (inclusivo).
+            end (datetime): Fim do intervalo (exclusivo).
+            page_size (int): Quantidade máxima de fechamentos da página.
+            cursor (optional): Cursor devolvido pela página anterior. Defaults to None (primeira página).
+
+        Returns:
+            tuple: Fechamentos da página (list de dicts com 'doc_id' e o registro de cada área encontrada)
+            e o cursor da próxima página (None na última página).
+        """
+
+
+    @abstractmethod
+    def get_state(self, state_id: str, fields: dict) -> dict:
+        """Estado materializado de um turno.
+
+        Args:
+            state_id (str): ID do estado no formato 'AAAA-MM-DD_<turno>'.
+            fields (dict): Campos retornados de cada área, indexados pelo identificador da área.
+
+        Returns:
+            dict: Registros de cada área, indexados pelo identificador da área.
+            Retorna None caso o turno não tenha estado materializado.
+        """
+
+
+    @abstractmethod
+    def commit_shift(self, doc_id: str, records: dict, state_id: str, state: dict) -> None:
+        """Grava os registros das quatro áreas, o estado materializado do turno e o incremento
+        dos rollups em um único commit atômico.
+
+        Args:
+            doc_id (str): ID dos documentos do fechamento.
+            records (dict): Registros de cada área, indexados pelo identificador da área.
+            state_id (str): ID do estado no formato 'AAAA-MM-DD_<turno>'.
+            state (dict): Estado materializado do turno.
+        """
+
+
+    @abstractmethod
+    def scan_page(self, area: str, page_size: int, after: str = None) -> list:
+        """Uma página de todos os documentos de uma área, em ordem de ID, para varreduras de manutenção.
+
+        Args:
+            area (str): Identificador da área ('eta', 'etei', 'obs' ou 'quim').
+            page_size (int): Quantidade máxima de documentos da página.
+            after (str, optional): ID do último documento da página anterior. Defaults to None (primeira página).
+
+        Returns:
+            list: Tuplas (ID do documento, registro completo).
+        """
+
+
+    @abstractmethod
+    def write_batch(self, writes: list) -> None:
+        """Grava registros das coleções de fechamento em um único lote atômico, sem atualizar o estado
+        materializado dos turnos nem os rollups. Usado na importação de históricos.
+
+        Args:
+            writes (list): Tuplas (área, ID do documento, registro), no máximo MAX_BATCH_WRITES.
+        """
+
+
+    @abstractmethod
+    def get_rollups(self, period: str, start_key: str, end_key: str) -> list:
+        """Rollups de um período, entre duas chaves (inclusivas), em ordem crescente.
+
+        Args:
+            period (str): 'day', 'week' ou 'month'.
+            start_key (str): Primeira chave.
+            end_key (str): Última chave.
+
+        Returns:
+            list: Um dict por chave, com 'key' e o valor de cada métrica.
+        """
+
+
+    @abstractmethod
+    def replace_rollups(self, period: str, rollups: dict) -> None:
+        """Substitui todos os rollups de um período (reconstrução a partir do histórico).
+
+        Args:
+            period (str): 'day', 'week' ou 'month'.
+            rollups (dict): Métricas de cada chave, indexadas pela chave.
+        """
+
+
+
+
+
+## FIRESTORE
+def firestore_indexes() -> dict:
+    """Índices compostos exigidos pelas consultas do FirestoreStorage, no formato do firestore.indexes.json.
+    Cada coleção de fechamento filtra o turno por igualdade (ou 'in') com intervalo e ordenação por data.
+    As demais consultas usam apenas um campo e são atendidas pelos índices automáticos.
+
+    Returns:
+        dict: Conteúdo do firestore.indexes.json.
+    """
+    return {
+        "indexes": [
+            {
+                "collectionGroup": f"fechamento_{area}",
+                "queryScope": "COLLECTION",
+                "fields": [
+                    {"fieldPath": "endedshift", "order": "ASCENDING"},
+                    {"fieldPath": "date", "order": "ASCENDING"},
+                ],
+            }
+            for area in schema.AREAS
+        ],
+        "fieldOverrides": [],
+    }
+
+
+
+
+
+class FirestoreStorage(Storage):
+    """Armazenamento no Firestore: coleções fechamento_<area> e shift_state.
+    """
+
+    def __init__(self, client: firestore.Client) -> None:
+        """
+        Args:
+            client (firestore.Client): Cliente do Firestore.
+        """
+        self.client = client
+
+
+    def ping(self) -> None:
+        self.client.collection(u"shift_state").limit(1).select([]).get()
+
+
+    def check_indexes(self) -> dict:
+        """Executa cada formato de consulta usado pela aplicação e identifica os que não têm índice.
+
+        Returns:
+            dict: Erro do Firestore (com o link para criar o índice) de cada consulta sem índice,
+            ou None quando a consulta é atendida, indexados pela descrição da consulta.
+        """
+        end = datetime.now(timezone.utc)
+        start = end - timedelta(days=1)
+
+        shapes = {u"fechamento_eta: último registro": self.latest_shift}
+        for area in schema.AREAS:
+            shapes.update({
+                f"fechamento_{area}: turno == e intervalo de datas":
+                    lambda area=area: list(self.query_area(area, start, end, "A", ("date",))),
+                f"fechamento_{area}: turno in e intervalo de datas":
+                    lambda area=area: self.query_page(area, start, end, ["A", "B", "C"], ("date",), 1),
+                f"fechamento_{area}: intervalo de datas":
+                    lambda area=area: self.query_page(area, start, end, [], ("date",), 1),
+            })
+        for period in ROLLUP_PERIODS:
+            shapes[f"rollups_{period}: intervalo de chaves"] = \
+                lambda period=period: self.get_rollups(period, "0000", "9999")
+
+        results = {}
+        for description, run in shapes.items():
+            try:
+                run()
+                results[description] = None
+            except IndexError:
+                results[description] = None     # coleção vazia: a consulta foi aceita
+            except FailedPrecondition as e:
+                results[description] = str(e)
+
+        return results
+
+
+    def watch_latest_shift(self, callback):
+        def on_snapshot(snapshots, changes, read_time) -> None:
+            # Na troca de turno o documento anterior sai da janela (REMOVED) e o novo entra (ADDED)
+            for change in changes:
+                if change.type.name in ("ADDED", "MODIFIED"):
+                    callback(change.document.id, change.document.to_dict())
+
+        return self.client.collection(u"shift_state").order_by(
+            u"date", direction=firestore.Query.DESCENDING
+        ).limit(1).on_snapshot(on_snapshot)
+
+
+    def latest_shift(self) -> tuple:
+        last_doc = self.client.collection(u"fechamento_eta").order_by(
+            u"date", direction=firestore.Query.DESCENDING
+        ).limit(1).get()[0].to_dict()
+
+        return last_doc["date"], last_doc["endedshift"]
+
+
+    def query_area(self, area: str, start: datetime, end: datetime, shift: str, fields: tuple) -> Iterable[dict]:
+        doc_ref = self.client.collection(f"fechamento_{area}").where(
+            u"date", u">", start
+        ).where(
+            u"date", u"<", end
+        ).where(
+            u"endedshift", u"==", f"{shift}"
+        ).order_by(
+            u"date", direction=firestore.Query.ASCENDING
+        ).select(
+            fields      # projeção: apenas os campos usados pela tela são transferidos
+        )
+
+        return (doc.to_dict() for doc in doc_ref.stream())
+
+
+    def query_range(self, area: str, start: datetime, end: datetime, fields: tuple) -> Iterable[dict]:
+        doc_ref = self.client.collection(f"fechamento_{area}").where(
+            u"date", u">=", start
+        ).where(
+            u"date", u"<", end
+        ).order_by(
+            u"date", direction=firestore.Query.ASCENDING
+        ).select(
+            fields
+        )
+
+        return (doc.to_dict() for doc in doc_ref.stream())
+
+
+    def query_page(self, area: str, start: datetime, end: datetime, shifts: list, fields: tuple,
+                   page_size: int, cursor=None) -> tuple:
+        doc_ref = self.client.collection(f"fechamento_{area}").where(
+            u"date", u">=", start
+        ).where(
+            u"date", u"<", end
+        )
+        if shifts:
+            doc_ref = doc_ref.where(u"endedshift", u"in", list(shifts))
+
+        doc_ref = doc_ref.order_by(
+            u"date", direction=firestore.Query.ASCENDING
+        ).select(
+            fields
+        ).limit(page_size)
+
+        # O cursor é o último snapshot da página anterior
+        if cursor is not None:
+            doc_ref = doc_ref.start_after(cursor)
+
+        snapshots = list(doc_ref.stream())
+        next_cursor = snapshots[-1] if len(snapshots) == page_size else None
+
+        return [doc.to_dict() for doc in snapshots], next_cursor
+
+
+    def export_page(self, start: datetime, end: datetime, page_size: int, cursor=None) -> tuple:
+        doc_ref = self.client.collection(u"fechamento_eta").where(
+            u"date", u">=", start
+        ).where(
+            u"date", u"<", end
+        ).order_by(
+            u"date", direction=firestore.Query.ASCENDING
+        ).limit(page_size)
+
+        if cursor is not None:
+            doc_ref = doc_ref.start_after(cursor)
+
+        snapshots = list(doc_ref.stream())
+        next_cursor = snapshots[-1] if len(snapshots) == page_size else None
+
+        shifts = {doc.id: {"doc_id": doc.id, "eta": doc.to_dict()} for doc in snapshots}
+        if shifts:
+            # Uma única leitura em lote (get_all) por área para os IDs da página
+            for area in schema.AREAS:
+                if area == "eta":
+                    continue
+                refs = [self.client.collection(f"fechamento_{area}").document(doc_id) for doc_id in shifts]
+                for doc in self.client.get_all(refs):
+                    if doc.exists:
+                        shifts[doc.id][area] = doc.to_dict()
+
+        return list(shifts.values()), next_cursor
+
+
+    def get_state(self, state_id: str, fields: dict) -> dict:
+        snapshot = self.client.collection(u"shift_state").document(state_id).get(
+            field_paths=[f"{area}.{field}" for area in fields for field in fields[area]]
+        )
+        if not snapshot.exists:
+            return None
+
+        return snapshot.to_dict()
+
+
+    def commit_shift(self, doc_id: str, records: dict, state_id: str, state: dict) -> None:
+        state_ref = self.client.collection(u"shift_state").document(state_id)
+
+        @firestore.transactional
+        def commit(transaction: firestore.Transaction) -> None:
+            previous = state_ref.get(transaction=transaction)
+            delta = rollup_delta(previous.to_dict() if previous.exists else None, state)
+
+            for area, record in records.items():
+                transaction.set(self.client.collection(f"fechamento_{area}").document(doc_id), record)
+            transaction.set(state_ref, state)
+
+            for period, key in rollup_keys(state_id).items():
+                transaction.set(
+                    self.client.collection(f"rollups_{period}").document(key),
+                    {"key": key, **{metric: firestore.Increment(value) for metric, value in delta.items()}},
+                    merge=True,
+                )
+
+        commit(self.client.transaction())
+
+
+    def scan_page(self, area: str, page_size: int, after: str = None) -> list:
+        doc_ref = self.client.collection(f"fechamento_{area}").order_by(u"__name__").limit(page_size)
+        if after is not None:
+            doc_ref = doc_ref.start_after({u"__name__": after})
+
+        return [(doc.id, doc.to_dict()) for doc in doc_ref.stream()]
+
+
+    def write_batch(self, writes: list) -> None:
+        batch = self.client.batch()
+        for area, doc_id, record in writes:
+            batch.set(self.client.collection(f"fechamento_{area}").document(doc_id), record)
+        batch.commit()
+
+
+    def get_rollups(self, period: str, start_key: str, end_key: str) -> list:
+        doc_ref = self.client.collection(f"rollups_{period}").where(
+            u"key", u">=", start_key
+        ).where(
+            u"key", u"<=", end_key
+        ).order_by(
+            u"key", direction=firestore.Query.ASCENDING
+        )
+
+        return [doc.to_dict() for doc in doc_ref.stream()]
+
+
+    def replace_rollups(self, period: str, rollups: dict) -> None:
+        collection = self.client.collection(f"rollups_{period}")
+
+        # Lotes de até 500 operações, o limite do Firestore
+        batch, operations = self.client.batch(), 0
+        for doc in collection.select([]).stream():
+            batch.delete(doc.reference)
+            operations += 1
+            if operations == 500:
+                batch.commit()
+                batch, operations = self.client.batch(), 0
+
+        for key, metrics in rollups.items():
+            batch.set(collection.document(key), {"key": key, **metrics})
+            operations += 1
+            if operations == 500:
+                batch.commit()
+                batch, operations = self.client.batch(), 0
+
+        if operations:
+            batch.commit()
+
+
+
+
+
+## SQL
+class SQLStorage(Storage):
+    """Armazenamento em banco SQL local (SQLite ou MySQL), com uma tabela por área e a tabela shift_state.
+    As consultas são parametrizadas e as tabelas indexadas por (endedshift, date) e por date.
+    """
+
+    # Tipos das colunas de cada tipo do schema
+    COLUMN_TYPES = {"timestamp": "DATETIME(6)", "str": "TEXT", "bool": "BOOLEAN", "float": "DOUBLE", "int": "INTEGER"}
+
+    def __init__(self, connection, dialect: str = "sqlite") -> None:
+        """
+        Args:
+            connection: Conexão DB-API (sqlite3 ou PyMySQL).
+            dialect (str, optional): 'sqlite' ou 'mysql'. Defaults to "sqlite".
+        """
+        self.connection = connection
+        self.dialect = dialect
+        self._placeholder = "?" if dialect == "sqlite" else "%s"
+        # Conexões DB-API não são seguras para uso simultâneo por várias threads
+        self._lock = threading.Lock()
+        self._create_tables()
+
+
+    def ping(self) -> None:
+        self._execute("SELECT 1")
+
+
+    def _cursor(self):
+        """Cursor da conexão. No MySQL, reconecta antes caso o servidor tenha encerrado a conexão
+        (por exemplo, após o wait_timeout). Deve ser chamado com o lock adquirido.
+        """
+        if self.dialect == "mysql":
+            self.connection.ping(reconnect=True)
+        return self.connection.cursor()
+
+
+    def _create_tables(self) -> None:
+        """Cria as tabelas e índices, caso ainda não existam, e as colunas de campos novos do schema.
+        """
+        statements, definitions = [], {}
+        for area in schema.AREAS:
+            definitions[area] = {}
+            for field in schema.FIELDS[area]:
+                column_type = self.COLUMN_TYPES[schema.TYPES[area][field]]
+                if field in schema.META_FIELDS and column_type == "TEXT":
+                    column_type = "VARCHAR(64)"     # MySQL não indexa TEXT sem prefixo
+                definitions[area][field] = column_type
+            columns = [
+                "doc_id VARCHAR(32) PRIMARY KEY",
+                *(f"{field} {column_type}" for field, column_type in definitions[area].items()),
+            ]
+
+            if self.dialect == "mysql":
+                columns += ["INDEX idx_shift_date (endedshift, date)", "INDEX idx_date (date)"]
+                statements.append(f"CREATE TABLE IF NOT EXISTS fechamento_{area} ({', '.join(columns)})")
+            else:
+                statements += [
+                    f"CREATE TABLE IF NOT EXISTS fechamento_{area} ({', '.join(columns)})",
+                    f"CREATE INDEX IF NOT EXISTS idx_{area}_shift_date ON fechamento_{area} (endedshift, date)",
+                    f"CREATE INDEX IF NOT EXISTS idx_{area}_date ON fechamento_{area} (date)",
+                ]
+
+        statements += [
+            "CREATE TABLE IF NOT EXISTS shift_state "
+            "(state_id VARCHAR(32) PRIMARY KEY, date DATETIME(6), endedshift VARCHAR(64), data TEXT)",
+            "CREATE TABLE IF NOT EXISTS rollups "
+            "(period VARCHAR(8), period_key VARCHAR(16), metric VARCHAR(64), value DOUBLE, "
+            "PRIMARY KEY (period, period_key, metric))",
+        ]
+
+        with self._lock:
+            cursor = self._cursor()
+            for statement in statements:
+                cursor.execute(statement)
+
+            # Tabelas criadas em versões anteriores do schema
+            for area, columns in definitions.items():
+                cursor.execute(f"SELECT * FROM fechamento_{area} LIMIT 0")
+                existing = {column[0] for column in cursor.description}
+                for field, column_type in columns.items():
+                    if field not in existing:
+                        cursor.execute(f"ALTER TABLE fechamento_{area} ADD COLUMN {field} {column_type}")
+            self.connection.commit()
+
+
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        """Executa uma consulta parametrizada e retorna as linhas como dicts.
+
+        Args:
+            sql (str): Consulta com '?' como marcador de parâmetro.
+            params (tuple, optional): Parâmetros da consulta. Defaults to ().
+
+        Returns:
+            list: Linhas resultantes.
+        """
+        with self._lock:
+            cursor = self._cursor()
+            try:
+                cursor.execute(sql.replace("?", self._placeholder), params)
+                columns = [column[0] for column in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            finally:
+                # Encerra a transação aberta pela leitura: no MySQL (REPEATABLE READ) a conexão
+                # continuaria lendo o mesmo snapshot, sem ver o que outros processos gravaram
+                self.connection.rollback()
+
+
+    @staticmethod
+    def _to_db_date(value: datetime) -> str:
+        """Converte uma data para o formato gravado no banco (UTC, ordenável como texto).
+
+        Args:
+            value (datetime): Data com ou sem fuso (sem fuso é tratada como UTC).
+
+        Returns:
+            str: Data no formato 'AAAA-MM-DD HH:MM:SS.ffffff'.
+        """
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+    @staticmethod
+    def _from_db_date(value) -> datetime:
+        """Converte a data lida do banco para datetime em UTC.
+
+        Args:
+            value (str | datetime): Data como devolvida pelo driver.
+
+        Returns:
+            datetime: Data com fuso UTC.
+        """
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        return value.replace(tzinfo=timezone.utc)
+
+
+    def _to_record(self, area: str, row: dict) -> dict:
+        """Converte uma linha do banco para um registro no formato do Firestore.
+
+        Args:
+            area (str): Identificador da área.
+            row (dict): Linha do banco.
+
+        Returns:
+            dict: Registro da área.
+        """
+        record = {}
+        for field, value in row.items():
+            if value is None or field == "doc_id":
+                continue
+            field_type = schema.TYPES[area][field]
+            if field_type == "timestamp":
+                value = self._from_db_date(value)
+            elif field_type == "bool":
+                value = bool(value)
+            record[field] = value
+
+        return record
+
+
+    def latest_shift(self) -> tuple:
+        rows = self._execute("SELECT date, endedshift FROM fechamento_eta ORDER BY date DESC LIMIT 1")
+
+        return self._from_db_date(rows[0]["date"]), rows[0]["endedshift"]
+
+
+    def query_area(self, area: str, start: datetime, end: datetime, shift: str, fields: tuple) -> Iterable[dict]:
+        rows = self._execute(
+            f"SELECT {', '.join(fields)} FROM fechamento_{area} "
+            "WHERE endedshift = ? AND date > ? AND date < ? ORDER BY date ASC",
+            (shift, self._to_db_date(start), self._to_db_date(end)),
+        )
+
+        return [self._to_record(area, row) for row in rows]
+
+
+    def query_range(self, area: str, start: datetime, end: datetime, fields: tuple) -> Iterable[dict]:
+        rows = self._execute(
+            f"SELECT {', '.join(fields)} FROM fechamento_{area} WHERE date >= ? AND date < ? ORDER BY date ASC",
+            (self._to_db_date(start), self._to_db_date(end)),
+        )
+
+        return [self._to_record(area, row) for row in rows]
+
+
+    def query_page(self, area: str, start: datetime, end: datetime, shifts: list, fields: tuple,
+                   page_size: int, cursor=None) -> tuple:
+        conditions = ["date >= ?", "date < ?"]
+        params = [self._to_db_date(start), self._to_db_date(end)]
+        if shifts:
+            conditions.append(f"endedshift IN ({', '.join('?' * len(shifts))})")
+            params += list(shifts)
+
+        # Paginação por chave: o cursor é o par (date, doc_id) do último registro da página anterior
+        if cursor is not None:
+            conditions.append("(date > ? OR (date = ? AND doc_id > ?))")
+            params += [cursor[0], cursor[0], cursor[1]]
+
+        rows = self._execute(
+            f"SELECT doc_id, {', '.join(fields)} FROM fechamento_{area} "
+            f"WHERE {' AND '.join(conditions)} ORDER BY date ASC, doc_id ASC LIMIT ?",
+            (*params, page_size),
+        )
+        next_cursor = (self._to_db_date(self._from_db_date(rows[-1]["date"])), rows[-1]["doc_id"]) \
+            if len(rows) == page_size else None
+
+        return [self._to_record(area, row) for row in rows], next_cursor
+
+
+    def export_page(self, start: datetime, end: datetime, page_size: int, cursor=None) -> tuple:
+        conditions = ["date >= ?", "date < ?"]
+        params = [self._to_db_date(start), self._to_db_date(end)]
+        if cursor is not None:
+            conditions.append("(date > ? OR (date = ? AND doc_id > ?))")
+            params += [cursor[0], cursor[0], cursor[1]]
+
+        rows = self._execute(
+            f"SELECT * FROM fechamento_eta WHERE {' AND '.join(conditions)} ORDER BY date ASC, doc_id ASC LIMIT ?",
+            (*params, page_size),
+        )
+        next_cursor = (self._to_db_date(self._from_db_date(rows[-1]["date"])), rows[-1]["doc_id"]) \
+            if len(rows) == page_size else None
+
+        shifts = {row["doc_id"]: {"doc_id": row["doc_id"], "eta": self._to_record("eta", row)} for row in rows}
+        if shifts:
+            for area in schema.AREAS:
+                if area == "eta":
+                    continue
+                for row in self._execute(
+                    f"SELECT * FROM fechamento_{area} WHERE doc_id IN ({', '.join('?' * len(shifts))})", tuple(shifts)
+                ):
+                    shifts[row["doc_id"]][area] = self._to_record(area, row)
+
+        return list(shifts.values()), next_cursor
+
+
+    def get_state(self, state_id: str, fields: dict) -> dict:
+        rows = self._execute("SELECT data FROM shift_state WHERE state_id = ?", (state_id,))
+        if not rows:
+            return None
+
+        state = json.loads(rows[0]["data"])
+        return {
+            area: self._to_record(area, {field: state[area][field] for field in fields[area] if field in state[area]})
+            for area in fields if area in state
+        }
+
+
+    def _replace_record(self, cursor, area: str, doc_id: str, record: dict) -> None:
+        """Grava (ou substitui) um registro de uma área, dentro da transação do cursor.
+
+        Args:
+            cursor: Cursor da conexão.
+            area (str): Identificador da área.
+            doc_id (str): ID do documento.
+            record (dict): Registro da área.
+        """
+        fields = [field for field in schema.FIELDS[area] if field in record]
+        cursor.execute(
+            f"REPLACE INTO fechamento_{area} (doc_id, {', '.join(fields)}) "
+            f"VALUES ({', '.join([self._placeholder] * (len(fields) + 1))})",
+            (doc_id, *[self._to_db_date(record[field]) if isinstance(record[field], datetime) else record[field]
+                       for field in fields]),
+        )
+
+
+    def commit_shift(self, doc_id: str, records: dict, state_id: str, state: dict) -> None:
+        def encode(value):
+            return self._to_db_date(value) if isinstance(value, datetime) else value
+
+        if self.dialect == "mysql":
+            upsert_rollup = "INSERT INTO rollups VALUES (%s, %s, %s, %s) ON DUPLICATE KEY UPDATE value = value + VALUES(value)"
+        else:
+            upsert_rollup = "INSERT INTO rollups VALUES (?, ?, ?, ?) ON CONFLICT (period, period_key, metric) DO UPDATE SET value = value + excluded.value"
+
+        # No MySQL a linha do estado fica travada até o commit: duas inserções simultâneas no mesmo turno
+        # não leem o mesmo estado anterior (o que contaria o turno duas vezes nos rollups)
+        select_state = "SELECT data FROM shift_state WHERE state_id = ?"
+        if self.dialect == "mysql":
+            select_state += " FOR UPDATE"
+
+        with self._lock:
+            cursor = self._cursor()
+            try:
+                cursor.execute(select_state.replace("?", self._placeholder), (state_id,))
+                row = cursor.fetchone()
+                delta = rollup_delta(json.loads(row[0]) if row else None, state)
+
+                for area, record in records.items():
+                    self._replace_record(cursor, area, doc_id, record)
+
+                cursor.execute(
+                    "REPLACE INTO shift_state (state_id, date, endedshift, data) "
+                    f"VALUES ({', '.join([self._placeholder] * 4)})",
+                    (state_id, encode(state["date"]), state["endedshift"], json.dumps(state, default=encode)),
+                )
+
+                cursor.executemany(upsert_rollup, [
+                    (period, key, metric, value)
+                    for period, key in rollup_keys(state_id).items()
+                    for metric, value in delta.items()
+                ])
+                self.connection.commit()
+
+            except Exception:
+                self.connection.rollback()
+                raise
+
+
+    def scan_page(self, area: str, page_size: int, after: str = None) -> list:
+        rows = self._execute(
+            f"SELECT * FROM fechamento_{area} WHERE doc_id > ? ORDER BY doc_id ASC LIMIT ?", (after or "", page_size)
+        )
+
+        return [(row["doc_id"], self._to_record(area, row)) for row in rows]
+
+
+    def write_batch(self, writes: list) -> None:
+        with self._lock:
+            cursor = self._cursor()
+            try:
+                for area, doc_id, record in writes:
+                    self._replace_record(cursor, area, doc_id, record)
+                self.connection.commit()
+
+            except Exception:
+                self.connection.rollback()
+                raise
+
+
+    def get_rollups(self, period: str, start_key: str, end_key: str) -> list:
+        rows = self._execute(
+            "SELECT period_key, metric, value FROM rollups "
+            "WHERE period = ? AND period_key >= ? AND period_key <= ? ORDER BY period_key",
+            (period, start_key, end_key),
+        )
+
+        rollups = {}
+        for row in rows:
+            rollups.setdefault(row["period_key"], {"key": row["period_key"]})[row["metric"]] = row["value"]
+
+        return list(rollups.values())
+
+
+    def replace_rollups(self, period: str, rollups: dict) -> None:
+        with self._lock:
+            cursor = self._cursor()
+            try:
+                cursor.execute(f"DELETE FROM rollups WHERE period = {self._placeholder}", (period,))
+                cursor.executemany(
+                    f"INSERT INTO rollups VALUES ({', '.join([self._placeholder] * 4)})",
+                    [(period, key, metric, value) for key, metrics in rollups.items() for metric, value in metrics.items()],
+                )
+                self.connection.commit()
+
+            except Exception:
+                self.connection.rollback()
+                raise
+
+
+
+
+
+## CONEXÃO
+def connect(secrets) -> Storage:
+    """Cria o armazenamento configurado na seção [storage] dos secrets.
+    Sem configuração, usa o Firestore com a chave de serviço em 'textkey'.
+
+    Args:
+        secrets: Secrets da aplicação (st.secrets).
+
+    Raises:
+        ValueError: Caso o backend configurado não exista.
+
+    Returns:
+        Storage: Armazenamento configurado.
+    """
+    config = secrets.get("storage", {})
+    backend = config.get("backend", "firestore")
+
+    if backend == "firestore":
+        key_dict = json.loads(secrets["textkey"])
+        return FirestoreStorage(firestore.Client.from_service_account_info(key_dict))
+
+    elif backend == "sqlite":
+        connection = sqlite3.connect(config.get("path", "book_turno.db"), check_same_thread=False)
+        return SQLStorage(connection, dialect="sqlite")
+
+    elif backend == "mysql":
+        import pymysql      # dependência opcional, apenas para o servidor local
+
+        connection = pymysql.connect(
+            host=config.get("host", "localhost"),
+            port=int(config.get("port", 3306)),
+            user=config["user"],
+            password=config["password"],
+            database=config["database"],
+            charset="utf8mb4",
+        )
+        return SQLStorage(connection, dialect="mysql")
+
+    raise ValueError(f"Backend de armazenamento desconhecido: {backend}")
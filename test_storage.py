@@ -0,0 +1,195 @@
+## IMPORTS
+import sqlite3
+from datetime import datetime, timedelta, timezone
+import pytest
+import schema
+import storage
+
+
+
+# Momento de referência dos testes
+WHEN = datetime(2024, 5, 17, 14, 30, 15, 123000, tzinfo=timezone.utc)
+
+
+
+
+
+## FUNÇÕES
+@pytest.fixture
+def db() -> storage.SQLStorage:
+    """Armazenamento SQLite em memória, com as tabelas criadas."""
+    return storage.SQLStorage(sqlite3.connect(":memory:", check_same_thread=False))
+
+
+
+
+
+def _closing(when: datetime, shift: str, operator: str, volume: float = 0.0) -> dict:
+    """Registros das quatro áreas de um fechamento, com o volume informado no primeiro químico."""
+    records = {
+        area: dict(schema.DEFAULTS[area], date=when, id=operator, endedshift=shift)
+        for area in schema.AREAS
+    }
+    records["quim"][schema.fields_of_type("quim", "float")[0]] = volume
+    records["obs"][schema.fields_of_type("obs", "str")[0]] = f"Fechamento {operator}"
+
+    return records
+
+
+
+
+
+def _commit(db: storage.SQLStorage, when: datetime, shift: str, operator: str, volume: float = 0.0) -> str:
+    """Grava um fechamento como o app, com o estado do turno, e devolve o ID do documento."""
+    doc_id = storage.new_doc_id(when)
+    records = _closing(when, shift, operator, volume)
+    state_id = f"{when:%Y-%m-%d}_{shift}"
+    db.commit_shift(doc_id, records, state_id, dict(records, date=when, endedshift=shift))
+
+    return doc_id
+
+
+
+
+
+def _decode(doc_id: str) -> int:
+    """Converte um ID de Base32 de Crockford para inteiro."""
+    value = 0
+    for char in doc_id:
+        value = (value << 5) | storage.ID_ALPHABET.index(char)
+
+    return value
+
+
+
+
+
+def test_new_doc_id_length_and_alphabet():
+    doc_id = storage.new_doc_id(WHEN)
+
+    assert len(doc_id) == 26
+    assert set(doc_id) <= set(storage.ID_ALPHABET)
+
+
+
+
+
+def test_new_doc_id_orders_by_timestamp():
+    moments = [WHEN + timedelta(milliseconds=offset) for offset in (0, 1, 2, 1000, 60_000, 86_400_000)]
+    doc_ids = [storage.new_doc_id(moment) for moment in moments]
+
+    assert doc_ids == sorted(doc_ids)
+    assert len(set(doc_ids)) == len(doc_ids)
+
+
+
+
+
+def test_new_doc_id_unique_within_millisecond():
+    doc_ids = {storage.new_doc_id(WHEN) for _ in range(10_000)}
+
+    assert len(doc_ids) == 10_000
+
+
+
+
+
+def test_new_doc_id_prefix_decodes_to_timestamp():
+    milliseconds = _decode(storage.new_doc_id(WHEN)) >> 80
+
+    assert datetime.fromtimestamp(milliseconds / 1000, tz=timezone.utc) == WHEN
+
+
+
+
+
+def test_sql_commit_shift_round_trip(db):
+    _commit(db, WHEN, "A", "1")
+    _commit(db, WHEN + timedelta(hours=1), "A", "2", volume=3.5)
+
+    state = db.get_state(f"{WHEN:%Y-%m-%d}_A", {area: schema.FIELDS[area] for area in schema.AREAS})
+    expected = _closing(WHEN + timedelta(hours=1), "A", "2", volume=3.5)
+
+    # O registro mais recente prevalece
+    assert state == expected
+    assert db.latest_shift() == (WHEN + timedelta(hours=1), "A")
+    assert db.get_state(f"{WHEN:%Y-%m-%d}_B", {"eta": schema.FIELDS["eta"]}) is None
+
+
+
+
+
+def test_sql_commit_shift_rollups(db):
+    chemical = schema.fields_of_type("quim", "float")[0]
+    _commit(db, WHEN, "A", "1", volume=2.0)
+    _commit(db, WHEN + timedelta(hours=1), "A", "2", volume=5.0)
+    _commit(db, WHEN + timedelta(hours=8), "B", "3", volume=1.5)
+
+    day = storage.rollup_keys(f"{WHEN:%Y-%m-%d}_A")["day"]
+    [rollup] = db.get_rollups("day", day, day)
+
+    # Um novo fechamento do mesmo turno substitui o anterior, sem contar o turno de novo
+    assert rollup["turnos"] == 2
+    assert rollup[chemical] == 6.5
+
+    db.replace_rollups("day", {day: {"turnos": 1.0, chemical: 1.0}})
+    assert db.get_rollups("day", day, day) == [{"key": day, "turnos": 1.0, chemical: 1.0}]
+
+
+
+
+
+def test_sql_query_page_keyset_pagination(db):
+    # Fechamentos com a mesma data são desempatados pelo ID do documento
+    moments = [WHEN, WHEN, WHEN + timedelta(minutes=1), WHEN + timedelta(minutes=1), WHEN + timedelta(minutes=2),
+               WHEN + timedelta(minutes=3), WHEN + timedelta(minutes=4)]
+    for number, when in enumerate(moments):
+        _commit(db, when, "A", str(number))
+
+    operators, cursor = [], None
+    while True:
+        records, cursor = db.query_page(
+            "eta", WHEN, WHEN + timedelta(days=1), ["A"], ("date", "id"), page_size=3, cursor=cursor
+        )
+        operators += [record["id"] for record in records]
+        if cursor is None:
+            break
+
+    assert sorted(operators) == [str(number) for number in range(len(moments))]
+    assert len(operators) == len(set(operators))
+    assert db.query_page("eta", WHEN, WHEN + timedelta(days=1), ["B"], ("date", "id"), page_size=3) == ([], None)
+
+
+
+
+
+def test_sql_export_page_keyset_pagination(db):
+    doc_ids = sorted(_commit(db, WHEN + timedelta(minutes=number), "A", str(number)) for number in range(5))
+
+    exported, cursor = [], None
+    while True:
+        shifts, cursor = db.export_page(WHEN, WHEN + timedelta(days=1), 2, cursor)
+        exported += shifts
+        if cursor is None:
+            break
+
+    assert [shift["doc_id"] for shift in exported] == doc_ids
+    assert all(set(shift) == {"doc_id", *schema.AREAS} for shift in exported)
+    assert exported[0]["obs"]["id"] == "0"
+
+
+
+
+
+def test_sql_adds_missing_columns():
+    connection = sqlite3.connect(":memory:", check_same_thread=False)
+    # Tabela criada por uma versão anterior do schema
+    connection.execute("CREATE TABLE fechamento_eta (doc_id VARCHAR(32) PRIMARY KEY, date DATETIME(6), endedshift TEXT)")
+    connection.execute("INSERT INTO fechamento_eta VALUES ('1', '2024-05-17 14:30:15.000000', 'A')")
+    connection.commit()
+
+    db = storage.SQLStorage(connection)
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(fechamento_eta)")}
+
+    assert columns == {"doc_id", *schema.FIELDS["eta"]}
+    assert db.scan_page("eta", 10) == [("1", {"date": WHEN.replace(microsecond=0), "endedshift": "A"})]